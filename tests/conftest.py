@@ -0,0 +1,48 @@
+"""
+Shared fixtures for the TomCat tests.
+"""
+import os
+import shutil
+
+import pytest
+
+from tomcat.config import Config
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Configuration whose .tomcat data folder lives in a temporary directory."""
+    return Config(str(tmp_path))
+
+
+@pytest.fixture(scope='session')
+def _app(tmp_path_factory):
+    # The route blueprints are module-level, so the app can only be created
+    # once per test run
+    from tomcat import app as tomcat_app
+
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('app'))
+    try:
+        app = tomcat_app.create_app()
+    finally:
+        os.chdir(cwd)
+    app.config['TESTING'] = True
+    return app, tomcat_app.config
+
+
+@pytest.fixture
+def app(_app):
+    """Flask application with empty upload and media folders."""
+    app, app_config = _app
+    for folder in (app_config.upload_folder, app_config.thumbnails_folder, app_config.lowmag_folder,
+                   app_config.tiltseries_folder, app_config.tomogram_folder):
+        shutil.rmtree(folder, ignore_errors=True)
+        os.makedirs(folder)
+    return app
+
+
+@pytest.fixture
+def app_config(_app):
+    """Configuration of the Flask application."""
+    return _app[1]
@@ -0,0 +1,54 @@
+"""
+Tests for importing session archives.
+"""
+import io
+import os
+import tarfile
+
+
+def make_archive(members):
+    """Build a .tar.gz archive in memory from (name, bytes) pairs."""
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode='w:gz') as tar:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def post_archive(client, data):
+    return client.post('/session/import_archive',
+                       data={'archive_file': (io.BytesIO(data), 'session.tar.gz')})
+
+
+def test_rejected_archive_leaves_existing_files_untouched(app, app_config):
+    existing = os.path.join(app_config.lowmag_folder, 'TS_01.jpg')
+    with open(existing, 'wb') as f:
+        f.write(b'original')
+
+    archive = make_archive([('lowmag/TS_01.jpg', b'imported'),
+                            ('lowmag/TS_02.jpg', b'new')])
+    response = post_archive(app.test_client(), archive)
+
+    assert response.status_code == 302
+    with open(existing, 'rb') as f:
+        assert f.read() == b'original'
+    assert sorted(os.listdir(app_config.lowmag_folder)) == ['TS_01.jpg']
+
+
+def test_archive_with_session_is_imported(app, app_config):
+    existing = os.path.join(app_config.lowmag_folder, 'TS_01.jpg')
+    with open(existing, 'wb') as f:
+        f.write(b'original')
+
+    archive = make_archive([('session.tomcat', b'tomo_name,notes\nTS_01,\n'),
+                            ('lowmag/TS_01.jpg', b'imported')])
+    response = post_archive(app.test_client(), archive)
+
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/session.tomcat')
+    with open(existing, 'rb') as f:
+        assert f.read() == b'imported'
+    assert os.path.exists(os.path.join(app_config.upload_folder, 'session.tomcat'))
+    assert sorted(os.listdir(app_config.lowmag_folder)) == ['TS_01.jpg']
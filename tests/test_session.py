@@ -0,0 +1,101 @@
+"""
+Tests for Session and SessionManager.
+"""
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from tomcat.models import session as session_module
+from tomcat.models.session import SessionManager
+
+
+@pytest.fixture
+def manager(config):
+    """SessionManager with a two-tomogram session file 'test.csv'."""
+    pd.DataFrame({
+        'tomo_name': ['TS_01', 'TS_02'],
+        'thickness': [0.0, 0.0],
+        'notes': ['', ''],
+        'delete': [False, False],
+        'score': [0.0, 0.0],
+        'double_confirmed': [False, False],
+    }).to_csv(os.path.join(config.upload_folder, 'test.csv'), index=False)
+    return SessionManager(config)
+
+
+@pytest.fixture
+def blocked_fsync(monkeypatch):
+    """Make session saves wait after writing, until the test releases them."""
+    started = threading.Event()
+    release = threading.Event()
+    fsync = os.fsync
+
+    def wait_fsync(fd):
+        fsync(fd)
+        started.set()
+        assert release.wait(5)
+
+    monkeypatch.setattr(session_module.os, 'fsync', wait_fsync)
+    return started, release
+
+
+def test_bulk_update_with_invalid_column_changes_nothing(manager):
+    session = manager.load_session('test.csv')
+
+    updated = session.bulk_update_tomogram_data(['TS_01', 'TS_02'], save=False,
+                                                notes=['first', 'second'], delete=[None, None])
+
+    assert updated == 0
+    assert not session._dirty
+    assert session.get_data()['notes'].fillna('').tolist() == ['', '']
+    assert session.get_data()['delete'].tolist() == [False, False]
+
+
+def test_bulk_update_updates_every_row_of_a_duplicated_name(config):
+    pd.DataFrame({'tomo_name': ['TS_01', 'TS_02', 'TS_01'], 'notes': ['', '', '']}).to_csv(
+        os.path.join(config.upload_folder, 'dup.csv'), index=False)
+    session = SessionManager(config).load_session('dup.csv')
+
+    assert session.bulk_update_tomogram_data(['TS_01'], save=False, notes=['seen']) == 1
+    assert session.get_data()['notes'].fillna('').tolist() == ['seen', 'seen', '']
+
+
+def test_load_during_background_save_returns_unsaved_changes(manager, blocked_fsync):
+    started, release = blocked_fsync
+    session = manager.load_session('test.csv')
+    session.bulk_update_tomogram_data(['TS_01'], save=False, notes=['from A'])
+    manager.save_later(session)
+
+    writer = threading.Thread(target=manager.flush_saves, args=('test.csv',))
+    writer.start()
+    assert started.wait(5)
+    try:
+        assert manager.load_session('test.csv') is session
+    finally:
+        release.set()
+        writer.join()
+
+
+def test_discarded_save_does_not_overwrite_newer_file(manager, config, blocked_fsync):
+    started, release = blocked_fsync
+    path = os.path.join(config.upload_folder, 'test.csv')
+    session = manager.load_session('test.csv')
+    session.bulk_update_tomogram_data(['TS_01'], save=False, notes=['stale'])
+    manager.save_later(session)
+
+    writer = threading.Thread(target=manager.flush_saves, args=('test.csv',))
+    writer.start()
+    assert started.wait(5)
+    try:
+        # A new upload replaces the file while the old session is being written
+        manager.discard_save('test.csv')
+        with open(path, 'w') as f:
+            f.write('tomo_name,notes\nTS_09,uploaded\n')
+    finally:
+        release.set()
+        writer.join()
+
+    assert pd.read_csv(path)['tomo_name'].tolist() == ['TS_09']
+    assert [name for name in os.listdir(config.upload_folder) if name.endswith('.tmp')] == []
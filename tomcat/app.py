@@ -4,20 +4,14 @@ TomCat - Tomography Catalogue Tool
 Main application script that integrates all modules and provides
 both web interface and command-line functionality.
 """
+import os
 import logging
 import typer
-from flask import Flask, request, jsonify
 
-# Import our modules
+# Import our modules. Flask, the media stack and the route blueprints are
+# imported inside create_app so CLI commands like `info` start quickly.
 from tomcat.config import Config
-from tomcat.utils.thread_utils import ThreadManager
-from tomcat.utils.file_utils import FileLocator
-from tomcat.utils.template_utils import register_template_utils
 from tomcat.models.session import SessionManager
-from tomcat.services.media_service import MediaManager
-
-# Import route blueprints
-from tomcat.routes import settings_routes, session_routes, media_routes
 
 # Set up logging
 logging.basicConfig(
@@ -48,18 +42,29 @@ def create_app():
     """
     global app, config, thread_manager, file_locator, session_manager, media_manager
 
+    from flask import Flask
+    from jinja2 import FileSystemBytecodeCache
+    from tomcat.utils.thread_utils import get_thread_manager, JobStore
+    from tomcat.utils.file_utils import FileLocator
+    from tomcat.utils.template_utils import register_template_utils
+    from tomcat.services.media_service import MediaManager
+
+    # Import route blueprints
+    from tomcat.routes import settings_routes, session_routes, media_routes
+
     # Initialize Flask application
     app = Flask(__name__)
     app.secret_key = 'tomcat_secret_key'
 
-    # ADD THIS LINE:
-    app.search_jobs = {} # Correctly attach to the app instance
+    # Background search and export jobs, polled by the session page
+    app.search_jobs = JobStore()
+    app.export_jobs = JobStore()
 
     # Initialize configuration
     config = Config()
 
-    # Create thread manager
-    thread_manager = ThreadManager(max_workers=4)
+    # Get the shared thread manager (created once per process)
+    thread_manager = get_thread_manager()
 
     # Initialize services and managers
     file_locator = FileLocator(config)
@@ -69,13 +74,19 @@ def create_app():
     # Configure Flask app with our settings
     app.config.update(config.get_flask_config())
 
+    # Persist compiled templates across restarts
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(config.template_cache_folder)
+
     # Make the 'min' function available in templates
     app.jinja_env.globals['min'] = min
 
-    # Helper function to check if a file is allowed
+    # Helper function to check if a file is allowed; the suffixes are
+    # computed once so each check is a single str.endswith call
+    allowed_suffixes = tuple('.' + ext.lower() for ext in config.allowed_extensions)
+
     def allowed_file(filename):
         """Check if a filename has an allowed extension."""
-        return '.' in filename and filename.rsplit('.', 1)[1].lower() in config.allowed_extensions
+        return filename.lower().endswith(allowed_suffixes)
 
     # Register blueprints
     app.register_blueprint(
@@ -98,45 +109,44 @@ def create_app():
     # Add URL rules for root routes
     app.add_url_rule('/', 'index', lambda: app.redirect('/session/'))
 
-    # Add compatibility routes for AJAX requests that might use old URLs
-    @app.route('/browse_directory', methods=['POST'])
-    def compat_browse_directory():
-        """Compatibility route for old AJAX requests"""
-        return app.view_functions['settings.browse_directory']()
-
-    @app.route('/media_status/<media_type>/<tomo_name>')
-    def compat_media_status(media_type, tomo_name):
-        """Compatibility route for old media status requests"""
-        return app.view_functions['media.get_media_status'](media_type, tomo_name)
-
-    @app.route('/thumbnail_status/<tomo_name>')
-    def compat_thumbnail_status(tomo_name):
-        """Compatibility route for old thumbnail status requests"""
-        return app.view_functions['media.get_thumbnail_status'](tomo_name)
-
-    @app.route('/thumbnail_progress')
-    def compat_thumbnail_progress():
-        """Compatibility route for old thumbnail progress requests"""
-        return app.view_functions['media.get_thumbnail_progress']()
-
-    @app.route('/serve_media/<media_type>/<tomo_name>')
-    def compat_serve_media(media_type, tomo_name):
-        """Compatibility route for old media serving requests"""
-        return app.view_functions['media.serve_media'](media_type, tomo_name)
-
-    @app.route('/thumbnails/<filename>')
-    def compat_serve_thumbnail(filename):
-        """Compatibility route for old thumbnail serving requests"""
-        return app.view_functions['media.serve_thumbnail'](filename)
-
-    @app.route('/process_tomograms', methods=['POST'])
-    def compat_process_tomograms():
-        """Compatibility route for batch processing tomograms"""
-        return app.view_functions['media.process_tomograms']()
+    # Add compatibility routes for AJAX requests that might use old URLs.
+    # The blueprint views are bound directly so requests dispatch straight
+    # to them without an extra wrapper call and view_functions lookup.
+    compat_routes = [
+        ('/browse_directory', 'compat_browse_directory', 'settings.browse_directory', ['POST']),
+        ('/media_status/<media_type>/<tomo_name>', 'compat_media_status', 'media.get_media_status', None),
+        ('/thumbnail_status/<tomo_name>', 'compat_thumbnail_status', 'media.get_thumbnail_status', None),
+        ('/thumbnail_progress', 'compat_thumbnail_progress', 'media.get_thumbnail_progress', None),
+        ('/serve_media/<media_type>/<tomo_name>', 'compat_serve_media', 'media.serve_media', None),
+        ('/thumbnails/<filename>', 'compat_serve_thumbnail', 'media.serve_thumbnail', None),
+        ('/process_tomograms', 'compat_process_tomograms', 'media.process_tomograms', ['POST']),
+    ]
+    for rule, endpoint, target, methods in compat_routes:
+        app.add_url_rule(rule, endpoint, view_func=app.view_functions[target], methods=methods)
+
+    @app.after_request
+    def x_accel_redirect(response):
+        """
+        Rewrite X-Sendfile headers (media, session downloads, exports) into
+        nginx's X-Accel-Redirect form when X_ACCEL_REDIRECT_PREFIX is set.
+        All served files live under the app data directory, which the
+        prefix maps to.
+        """
+        accel_prefix = app.config.get('X_ACCEL_REDIRECT_PREFIX')
+        if accel_prefix and 'X-Sendfile' in response.headers:
+            relative_path = os.path.relpath(response.headers.pop('X-Sendfile'), app.config['APP_DATA_DIR'])
+            response.headers['X-Accel-Redirect'] = (
+                f"{accel_prefix.rstrip('/')}/{relative_path.replace(os.sep, '/')}")
+        return response
 
     # Register template utilities
     register_template_utils(app)
 
+    # Compile the URL map and the templates now rather than on first request
+    app.url_map.update()
+    for template_name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(template_name)
+
     logger.info("Flask application initialized")
     return app
 
@@ -149,10 +159,20 @@ def create_app():
 def run(
     host: str = typer.Option("127.0.0.1", help="Host to bind to"),
     port: int = typer.Option(16006, help="Port to bind to"),
-    debug: bool = typer.Option(False, help="Enable debug mode")
+    debug: bool = typer.Option(False, help="Enable debug mode"),
+    x_sendfile: bool = typer.Option(
+        False, help="Let a reverse proxy (nginx/Apache) deliver media files, session "
+                    "downloads and exports via X-Sendfile"
+    ),
+    x_accel_prefix: str = typer.Option(
+        "", help="nginx internal location mapped to the app data directory; "
+                 "sends X-Accel-Redirect instead of X-Sendfile"
+    )
 ):
     """Run the TomCat web application."""
     app = create_app()
+    app.config['USE_X_SENDFILE'] = x_sendfile or bool(x_accel_prefix)
+    app.config['X_ACCEL_REDIRECT_PREFIX'] = x_accel_prefix
     logger.info(f"Starting TomCat on {host}:{port} (debug={debug})")
     app.run(host=host, port=port, debug=debug)
 
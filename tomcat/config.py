@@ -35,6 +35,8 @@ class Config:
         self.lowmag_folder = os.path.join(self.media_folder, 'lowmag')
         self.tiltseries_folder = os.path.join(self.media_folder, 'tiltseries')
         self.tomogram_folder = os.path.join(self.media_folder, 'tomogram')
+        self.template_cache_folder = os.path.join(self.app_data_dir, 'template_cache')
+        self.exports_folder = os.path.join(self.app_data_dir, 'exports')
 
         # Config file path
         self.config_file = os.path.join(self.app_data_dir, 'config.json')
@@ -51,7 +53,10 @@ class Config:
 
         # App name and other settings
         self.app_name = 'TomCat'
-        self.allowed_extensions = {'tomcat'}
+        self.allowed_extensions = frozenset({'tomcat'})
+
+        # Cached result of get_flask_config, rebuilt after paths change
+        self._flask_config_cache = None
 
         # Create necessary directories
         self._create_directories()
@@ -68,7 +73,9 @@ class Config:
             self.media_folder,
             self.lowmag_folder,
             self.tiltseries_folder,
-            self.tomogram_folder
+            self.tomogram_folder,
+            self.template_cache_folder,
+            self.exports_folder
         ]
 
         for directory in directories:
@@ -89,11 +96,13 @@ class Config:
                 for key, default_value in self.default_paths.items():
                     self.paths[key] = loaded_config.get(key, default_value)
 
+                self._flask_config_cache = None
                 logger.info(f"Loaded configuration from {self.config_file}")
             except Exception as e:
                 logger.error(f"Error loading config: {str(e)}")
                 # If there's an error, reset to defaults
                 self.paths = self.default_paths.copy()
+                self._flask_config_cache = None
         else:
             # Create default config file
             logger.info("No config file found, creating with defaults")
@@ -101,13 +110,23 @@ class Config:
 
     def save(self):
         """Save current configuration to the config file."""
+        # Paths may have been reassigned directly before saving
+        self._flask_config_cache = None
+        # Write to a temporary file and swap it in, so a failed write never
+        # leaves a truncated config file behind
+        tmp_path = self.config_file + '.tmp'
         try:
-            with open(self.config_file, 'w') as f:
+            with open(tmp_path, 'w', buffering=1 << 18) as f:
                 json.dump(self.paths, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.config_file)
             logger.info(f"Saved configuration to {self.config_file}")
             return True
         except Exception as e:
             logger.error(f"Error saving config: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
             return False
 
     def update_paths(self, **kwargs):
@@ -131,11 +150,15 @@ class Config:
     def get_flask_config(self):
         """
         Get configuration dictionary for Flask app.config.
+        The dictionary is built once and reused until the paths change.
 
         Returns:
             dict: Configuration dictionary for Flask
         """
-        config_dict = {
+        if self._flask_config_cache is not None:
+            return self._flask_config_cache
+
+        self._flask_config_cache = {
             'APP_NAME': self.app_name,
             'APP_DATA_DIR': self.app_data_dir,
             'LOCAL_UPLOAD_FOLDER': self.upload_folder,
@@ -144,8 +167,9 @@ class Config:
             'LOWMAG_MEDIA_FOLDER': self.lowmag_folder,
             'TILTSERIES_MEDIA_FOLDER': self.tiltseries_folder,
             'TOMOGRAM_MEDIA_FOLDER': self.tomogram_folder,
+            'EXPORTS_FOLDER': self.exports_folder,
             'CONFIG_FILE': self.config_file,
             'PATHS': self.paths,
             'ALLOWED_EXTENSIONS': self.allowed_extensions
         }
-        return config_dict
\ No newline at end of file
+        return self._flask_config_cache
\ No newline at end of file
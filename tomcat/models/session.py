@@ -5,14 +5,55 @@ This module provides classes for handling session data operations,
 including loading, saving, and manipulating tomogram session data.
 """
 import os
+import csv
 import time
+import atexit
 import logging
-import pandas as pd
+import threading
+import functools
+from collections import OrderedDict
 from werkzeug.utils import secure_filename
 from contextlib import contextmanager # Add this import
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of parsed sessions kept in memory; the least recently
+# loaded are dropped first
+SESSION_CACHE_MAXSIZE = 64
+
+# Seconds load_session reuses a cached session without checking its file
+SESSION_REVALIDATE_INTERVAL = 1.0
+
+# Seconds SessionManager.save_later waits before writing, so a burst of
+# autosaves to the same session is written to disk once
+SAVE_DELAY = 1.0
+
+
+def _locked(method):
+    """Run a Session method while holding the session's lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _file_signature(path):
+    """
+    Get a signature that changes whenever a file is rewritten.
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        tuple or None: (mtime_ns, size) of the file, or None if it doesn't exist
+    """
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return st.st_mtime_ns, st.st_size
+
 
 class Session:
     """
@@ -20,6 +61,15 @@ class Session:
     Provides methods to load, save, and manipulate session data.
     """
 
+    # Column types used when reading session files, so pandas can skip
+    # type inference (boolean columns are left to the parser to detect)
+    COLUMN_DTYPES = {
+        'tomo_name': str,
+        'thickness': 'float64',
+        'notes': str,
+        'score': 'float64'
+    }
+
     def __init__(self, config, filename=None):
         """
         Initialize a session.
@@ -33,21 +83,68 @@ class Session:
         self.filepath = None
 
         # Default empty dataframe with the required schema
-        self._df = pd.DataFrame({
-            'tomo_name': [],
-            'thickness': [],
-            'notes': [],
-            'delete': [],
-            'score': [],
-            'double_confirmed': []
-        })
+        self._df = self._empty_frame()
         self._defer_save = False # Add this line
 
+        # True when the in-memory data has changes not yet written to disk
+        self._dirty = False
+
+        # Serializes changes and saves, which may run on a background writer
+        self._lock = threading.RLock()
+
+        # Rows added since the last flush, appended to the dataframe in bulk
+        self._pending_rows = []
+
+        # Sorted view of the data returned by get_data, rebuilt after changes
+        self._sorted_df = None
+
+        # Lowercased notes for the current sorted view, as (sorted_df, series)
+        self._notes_lower = (None, None)
+
+        # List returned by get_tomogram_names, rebuilt when rows change
+        self._names_cache = None
+
+        # Signature of the session file as last loaded or saved by this object
+        self._signature = None
+
+        # Monotonic time the file was last confirmed to match _signature
+        self._validated_at = 0.0
+
+        # Row position of each tomogram and column positions for fast lookups.
+        # Names that occur in several rows (possible in uploaded files) also
+        # map to all their positions in _duplicate_rows
+        self._name_to_idx = {}
+        self._duplicate_rows = {}
+        self._col_idx = {}
+        self._rebuild_index()
+
         # Load existing session if filename is provided
         if filename:
             self.filepath = os.path.join(config.upload_folder, filename)
             self.load()
 
+    @classmethod
+    def _empty_frame(cls):
+        """
+        Create an empty session dataframe with typed columns, so boolean and
+        numeric columns are stored natively rather than as Python objects.
+
+        Returns:
+            pandas.DataFrame: Empty dataframe with the session schema
+        """
+        # pandas is imported lazily so listing sessions (e.g. `tomcat info`)
+        # does not pay its import cost
+        import pandas as pd
+
+        return pd.DataFrame({
+            'tomo_name': pd.Series([], dtype=cls.COLUMN_DTYPES['tomo_name']),
+            'thickness': pd.Series([], dtype=cls.COLUMN_DTYPES['thickness']),
+            'notes': pd.Series([], dtype=cls.COLUMN_DTYPES['notes']),
+            'delete': pd.Series([], dtype='bool'),
+            'score': pd.Series([], dtype=cls.COLUMN_DTYPES['score']),
+            'double_confirmed': pd.Series([], dtype='bool')
+        })
+
     def load(self):
         """
         Load session data from file.
@@ -60,8 +157,20 @@ class Session:
             return False
 
         try:
-            # Load the CSV file
-            self._df = pd.read_csv(self.filepath)
+            import pandas as pd
+
+            self._pending_rows = []
+
+            # Take the signature before reading, so a concurrent rewrite
+            # leaves it stale rather than newer than the data
+            signature = _file_signature(self.filepath)
+
+            # Load the CSV file with a known schema, falling back to type
+            # inference for files with unexpected values
+            try:
+                self._df = pd.read_csv(self.filepath, dtype=self.COLUMN_DTYPES)
+            except (ValueError, TypeError):
+                self._df = pd.read_csv(self.filepath)
 
             # Ensure all required columns exist
             for col in ['tomo_name', 'thickness', 'notes', 'delete', 'score', 'double_confirmed']:
@@ -75,6 +184,9 @@ class Session:
                     else:
                         self._df[col] = ''
 
+            self._rebuild_index()
+            self._signature = signature
+
             logger.info(f"Loaded session from {self.filepath}")
             return True
 
@@ -82,10 +194,15 @@ class Session:
             logger.error(f"Error loading session: {str(e)}")
             return False
 
-    def save(self):
+    @_locked
+    def save(self, replace_guard=None):
         """
         Save session data to file.
 
+        Args:
+            replace_guard (optional): Context manager entered around replacing
+                the file; the save is abandoned if it yields False
+
         Returns:
             bool: True if successful, False otherwise
         """
@@ -93,14 +210,35 @@ class Session:
             logger.error("Cannot save session: no filepath specified")
             return False
 
+        # Unique per thread, so a concurrent save of the same file by another
+        # Session object never writes to or removes this one's temporary file
+        tmp_path = f"{self.filepath}.{threading.get_ident()}.tmp"
         try:
-            # Save the session dataframe to its designated filepath
-            self._df.to_csv(self.filepath, index=False)
+            # Save the session dataframe to a temporary file next to its
+            # designated filepath, then atomically replace the original
+            self._flush_pending_rows()
+            with open(tmp_path, 'w', newline='', buffering=1 << 18) as f:
+                self._df.to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            if replace_guard is None:
+                os.replace(tmp_path, self.filepath)
+            else:
+                with replace_guard as current:
+                    if not current:
+                        os.remove(tmp_path)
+                        logger.info(f"Skipped stale save of {self.filepath}")
+                        return False
+                    os.replace(tmp_path, self.filepath)
+            self._signature = _file_signature(self.filepath)
+            self._dirty = False
             logger.info(f"Saved session to {self.filepath}")
             return True
 
         except Exception as e:
             logger.error(f"Error saving session: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
             return False
 
     def create_new_session(self, custom_name=None):
@@ -131,14 +269,9 @@ class Session:
             self.filepath = os.path.join(self.config.upload_folder, new_filename)
 
             # Reset dataframe to empty with required schema
-            self._df = pd.DataFrame({
-                'tomo_name': [],
-                'thickness': [],
-                'notes': [],
-                'delete': [],
-                'score': [],
-                'double_confirmed': []
-            })
+            self._pending_rows = []
+            self._df = self._empty_frame()
+            self._rebuild_index()
 
             # Save the new session
             if self.save():
@@ -150,25 +283,89 @@ class Session:
             logger.error(f"Error creating new session: {str(e)}")
             return None
 
+    def _rebuild_index(self):
+        """Rebuild the tomogram name and column position lookups."""
+        self._sorted_df = None
+        self._names_cache = None
+        self._name_to_idx = {}
+        self._duplicate_rows = {}
+        for idx, name in enumerate(self._df['tomo_name'].tolist()):
+            first = self._name_to_idx.setdefault(name, idx)
+            if first != idx:
+                self._duplicate_rows.setdefault(name, [first]).append(idx)
+        if self._duplicate_rows:
+            logger.warning(f"Session {self.filename} has duplicated tomogram names; "
+                           f"updates apply to every row: {', '.join(map(str, self._duplicate_rows))}")
+        self._col_idx = {col: idx for idx, col in enumerate(self._df.columns)}
+
+    def _rows_for(self, tomo_name):
+        """
+        Get the row positions of a tomogram.
+
+        Args:
+            tomo_name (str): Name of the tomogram
+
+        Returns:
+            list: Row positions, empty if the tomogram is not in the session
+        """
+        rows = self._duplicate_rows.get(tomo_name)
+        if rows is not None:
+            return rows
+        idx = self._name_to_idx.get(tomo_name)
+        return [] if idx is None else [idx]
+
+    @_locked
+    def _flush_pending_rows(self):
+        """Append all pending rows to the dataframe with a single concat."""
+        if self._pending_rows:
+            import pandas as pd
+
+            self._df = pd.concat([self._df, pd.DataFrame(self._pending_rows)], ignore_index=True)
+            self._pending_rows = []
+            self._sorted_df = None
+            self._names_cache = None
+
     def get_data(self):
         """
         Get the session data as a pandas DataFrame, sorted alphabetically by tomogram name.
+        The sorted frame is cached until the session changes, so callers should
+        treat it as read-only.
 
         Returns:
             pandas.DataFrame: Session data sorted by tomo_name
         """
         # Return a copy of the dataframe sorted by tomo_name in ascending order
-        return self._df.sort_values('tomo_name', ascending=True).reset_index(drop=True)
+        self._flush_pending_rows()
+        if self._sorted_df is None:
+            self._sorted_df = self._df.sort_values('tomo_name', ascending=True).reset_index(drop=True)
+        return self._sorted_df
+
+    def get_notes_lower(self):
+        """
+        Get the notes column of get_data() as lowercase strings, for
+        case-insensitive searches. Computed once per version of the data.
+
+        Returns:
+            pandas.Series: Lowercased notes, aligned with get_data()
+        """
+        df = self.get_data()
+        if self._notes_lower[0] is not df:
+            self._notes_lower = (df, df['notes'].fillna('').astype(str).str.lower())
+        return self._notes_lower[1]
 
     @contextmanager
     def deferred_save(self):
-        """Context manager to defer saving until the block is exited."""
+        """
+        Context manager to defer saving until the block is exited.
+        The file is only rewritten if the block actually changed the data.
+        """
         self._defer_save = True
         try:
             yield
         finally:
             self._defer_save = False
-            self.save()
+            if self._dirty:
+                self.save()
 
     def get_tomogram_data(self, tomo_name):
         """
@@ -180,12 +377,14 @@ class Session:
         Returns:
             dict or None: Tomogram data as a dictionary, or None if not found
         """
-        tomo_row = self._df[self._df['tomo_name'] == tomo_name]
-        if tomo_row.empty:
+        idx = self._name_to_idx.get(tomo_name)
+        if idx is None:
             return None
 
-        return tomo_row.iloc[0].to_dict()
+        self._flush_pending_rows()
+        return self._df.iloc[idx].to_dict()
 
+    @_locked
     def update_tomogram_data(self, tomo_name, **kwargs):
         """
         Update data for a specific tomogram.
@@ -197,15 +396,27 @@ class Session:
         Returns:
             bool: True if successful, False otherwise
         """
-        if tomo_name not in self._df['tomo_name'].values:
+        rows = self._rows_for(tomo_name)
+        if not rows:
             logger.error(f"Tomogram not found in session: {tomo_name}")
             return False
 
         try:
-            # Update each provided field
+            self._flush_pending_rows()
+
+            # Update each provided field (in every row with this name)
+            self._sorted_df = None
+            self._dirty = True
             for key, value in kwargs.items():
-                if key in self._df.columns:
-                    self._df.loc[self._df['tomo_name'] == tomo_name, key] = value
+                col = self._col_idx.get(key)
+                if col is None:
+                    continue
+                for idx in rows:
+                    self._df.iat[idx, col] = value
+
+            # Renaming a tomogram invalidates the name lookups
+            if 'tomo_name' in kwargs:
+                self._rebuild_index()
 
             # Save the updated session unless deferred
             if not self._defer_save:
@@ -216,7 +427,80 @@ class Session:
             logger.error(f"Error updating tomogram data: {str(e)}")
             return False
 
-    def add_tomogram(self, tomo_name, thickness=0.0, notes='', delete=False, score=0.0, double_confirmed=False):
+    @_locked
+    def bulk_update_tomogram_data(self, tomo_names, save=True, **columns):
+        """
+        Update several tomograms at once, assigning each column in a single
+        vectorized step instead of one cell at a time.
+
+        Args:
+            tomo_names (list): Names of the tomograms to update
+            save (bool): If False, leave writing the file to the caller
+                         (e.g. SessionManager.save_later)
+            **columns: Column name -> list of values, aligned with tomo_names
+
+        Returns:
+            int: Number of tomograms that were found and updated
+        """
+        rows = []
+        matched = []
+        found = 0
+        for i, tomo_name in enumerate(tomo_names):
+            tomo_rows = self._rows_for(tomo_name)
+            if not tomo_rows:
+                logger.error(f"Tomogram not found in session: {tomo_name}")
+                continue
+            rows.extend(tomo_rows)
+            matched.extend([i] * len(tomo_rows))
+            found += 1
+
+        if not rows:
+            return 0
+
+        try:
+            import pandas as pd
+
+            self._flush_pending_rows()
+
+            # Convert every column before changing any of them, so a value
+            # the column's dtype can't hold leaves the session untouched
+            staged = []
+            for key, values in columns.items():
+                col = self._col_idx.get(key)
+                if col is None:
+                    continue
+                column_values = [values[i] for i in matched]
+                # Form inputs arrive as strings; parse numeric columns in one
+                # pass (blank or invalid input becomes NaN, as on reload)
+                if pd.api.types.is_float_dtype(self._df.dtypes.iloc[col]):
+                    column_values = pd.to_numeric(pd.Series(column_values, dtype=object),
+                                                  errors='coerce').to_numpy(dtype='float64')
+                # Assigning into a copy raises on values the dtype rejects
+                converted = self._df.iloc[rows, col].copy()
+                converted.iloc[:] = column_values
+                staged.append((col, converted.to_numpy()))
+
+            for col, column_values in staged:
+                self._df.iloc[rows, col] = column_values
+            self._sorted_df = None
+            self._dirty = True
+
+            # Renaming tomograms invalidates the name lookups
+            if 'tomo_name' in columns:
+                self._rebuild_index()
+
+            # Save the updated session unless deferred
+            if save and not self._defer_save and not self.save():
+                return 0
+            return found
+
+        except Exception as e:
+            logger.error(f"Error updating tomogram data: {str(e)}")
+            return 0
+
+    @_locked
+    def add_tomogram(self, tomo_name, thickness=0.0, notes='', delete=False, score=0.0, double_confirmed=False,
+                     save=True):
         """
         Add a new tomogram to the session.
 
@@ -227,35 +511,40 @@ class Session:
             delete (bool, optional): Whether the tomogram is marked for deletion
             score (float, optional): Score value
             double_confirmed (bool, optional): Whether the tomogram is double confirmed
+            save (bool, optional): If False, leave writing the file to the caller
+                                   (e.g. SessionManager.save_later)
 
         Returns:
             bool: True if successful, False otherwise
         """
-        if tomo_name in self._df['tomo_name'].values:
+        if tomo_name in self._name_to_idx:
             logger.warning(f"Tomogram already exists in session: {tomo_name}")
             return False
 
         try:
-            # Create a new row for this tomogram
-            new_row = pd.DataFrame({
-                'tomo_name': [tomo_name],
-                'thickness': [thickness],
-                'notes': [notes],
-                'delete': [delete],
-                'score': [score],
-                'double_confirmed': [double_confirmed]
+            # Queue the new row; it is appended to the dataframe on the next
+            # save or read instead of copying the whole frame per addition
+            self._name_to_idx[tomo_name] = len(self._df) + len(self._pending_rows)
+            self._pending_rows.append({
+                'tomo_name': tomo_name,
+                'thickness': thickness,
+                'notes': notes,
+                'delete': delete,
+                'score': score,
+                'double_confirmed': double_confirmed
             })
+            self._dirty = True
 
-            # Add the new row to the dataframe
-            self._df = pd.concat([self._df, new_row], ignore_index=True)
-
-            # Save the updated session
-            return self.save()
+            # Save the updated session unless deferred
+            if save and not self._defer_save:
+                return self.save()
+            return True
 
         except Exception as e:
             logger.error(f"Error adding tomogram: {str(e)}")
             return False
 
+    @_locked
     def add_tomograms_from_search(self, search_results):
         """
         Add multiple tomograms from search results.
@@ -270,8 +559,8 @@ class Session:
         skipped_count = 0
 
         try:
-            # Get existing tomogram names
-            existing_tomo_names = self._df['tomo_name'].values
+            # Get existing tomogram names as a set for constant-time lookups
+            existing_tomo_names = set(self._name_to_idx)
 
             # Prepare new rows
             new_rows = []
@@ -279,10 +568,11 @@ class Session:
             for result in search_results:
                 tomo_name = result['name']
 
-                # Skip if already exists
+                # Skip if already exists (in the session or earlier in the results)
                 if tomo_name in existing_tomo_names:
                     skipped_count += 1
                     continue
+                existing_tomo_names.add(tomo_name)
 
                 # Create a new row for this tomogram
                 new_rows.append({
@@ -298,10 +588,14 @@ class Session:
 
             if new_rows:
                 # Add all new rows at once
-                self._df = pd.concat([self._df, pd.DataFrame(new_rows)], ignore_index=True)
+                for offset, row in enumerate(new_rows):
+                    self._name_to_idx[row['tomo_name']] = len(self._df) + len(self._pending_rows) + offset
+                self._pending_rows.extend(new_rows)
+                self._dirty = True
 
-                # Save the updated session
-                self.save()
+                # Save the updated session unless deferred
+                if not self._defer_save:
+                    self.save()
 
             return (added_count, skipped_count)
 
@@ -312,11 +606,16 @@ class Session:
     def get_tomogram_names(self):
         """
         Get a list of all tomogram names in the session.
+        The list is cached until rows are added or the session is reloaded,
+        so callers should not modify it.
 
         Returns:
             list: List of tomogram names
         """
-        return self._df['tomo_name'].tolist()
+        self._flush_pending_rows()
+        if self._names_cache is None:
+            self._names_cache = self._df['tomo_name'].tolist()
+        return self._names_cache
 
 
 class SessionManager:
@@ -333,6 +632,53 @@ class SessionManager:
         """
         self.config = config
 
+        # Cached entry counts keyed by filename: {filename: ((mtime, size), count)}
+        self._entry_counts = {}
+
+        # Loaded sessions keyed by filename (least recently used first),
+        # reused while the file is unchanged
+        self._sessions = OrderedDict()
+        self._sessions_lock = threading.Lock()
+
+        # Sessions waiting for the background writer, keyed by filename
+        self._pending_saves = {}
+        # Sessions being written right now; their changes aren't on disk yet
+        self._saving = {}
+        # Bumped by discard_save, so writes already under way for a deleted or
+        # replaced session file are skipped instead of overwriting it
+        self._generations = {}
+        self._save_cond = threading.Condition()
+        self._writer = None
+        atexit.register(self.flush_saves)
+
+    def _count_entries(self, file_path, signature):
+        """
+        Count the data rows in a session file, reusing the cached count
+        while the file's modification time and size are unchanged.
+
+        Args:
+            file_path (str): Path to the session file
+            signature (tuple): (mtime, size) of the file
+
+        Returns:
+            int: Number of entries in the session file
+        """
+        filename = os.path.basename(file_path)
+        cached = self._entry_counts.get(filename)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        # Count CSV records without building a DataFrame; the csv module
+        # still handles notes containing quoted newlines correctly
+        try:
+            with open(file_path, 'r', newline='', buffering=1 << 18) as f:
+                entry_count = max(sum(1 for row in csv.reader(f) if row) - 1, 0)
+        except Exception:
+            entry_count = 0
+
+        self._entry_counts[filename] = (signature, entry_count)
+        return entry_count
+
     def get_sessions(self):
         """
         Get a list of all available sessions.
@@ -340,36 +686,34 @@ class SessionManager:
         Returns:
             list: List of session information dictionaries
         """
-        # Check for existing session files (both .csv and .tomcat)
-        csv_files = [f for f in os.listdir(self.config.upload_folder)
-                     if f.endswith('.csv')]
-        tomcat_files = [f for f in os.listdir(self.config.upload_folder)
-                        if f.endswith('.tomcat')]
-
-        session_files = csv_files + tomcat_files
+        # Scan for session files (both .csv and .tomcat); DirEntry caches
+        # its stat result so each file is stat'ed only once
+        with os.scandir(self.config.upload_folder) as it:
+            entries = [(entry.name, entry.path, entry.stat()) for entry in it
+                       if entry.name.endswith(('.csv', '.tomcat'))]
 
         # Sort by modification time (most recent first)
-        session_files.sort(
-            key=lambda f: os.path.getmtime(os.path.join(self.config.upload_folder, f)),
-            reverse=True
-        )
+        entries.sort(key=lambda e: e[2].st_mtime, reverse=True)
+
+        # Forget cached counts and sessions for files that no longer exist
+        existing = {name for name, _, _ in entries}
+        for filename in list(self._entry_counts):
+            if filename not in existing:
+                del self._entry_counts[filename]
+        with self._sessions_lock:
+            for filename in list(self._sessions):
+                if filename not in existing:
+                    del self._sessions[filename]
 
         # Get list of existing sessions for display
         sessions = []
-        for filename in session_files:
-            file_path = os.path.join(self.config.upload_folder, filename)
-            mtime = os.path.getmtime(file_path)
-
-            # Try to get the count of entries
-            try:
-                df = pd.read_csv(file_path)
-                entry_count = len(df)
-            except:
-                entry_count = 0
+        for filename, file_path, st in entries:
+            # Get the count of entries
+            entry_count = self._count_entries(file_path, (st.st_mtime, st.st_size))
 
             sessions.append({
                 'filename': filename,
-                'modified': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(mtime)),
+                'modified': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(st.st_mtime)),
                 'entry_count': entry_count
             })
 
@@ -397,7 +741,11 @@ class SessionManager:
 
     def load_session(self, filename):
         """
-        Load an existing session.
+        Load an existing session. The parsed session is kept in memory and
+        returned again while its file's mtime and size are unchanged, so
+        repeated page loads don't re-parse the CSV. Within
+        SESSION_REVALIDATE_INTERVAL of the last check the file isn't even
+        stat'ed, so the several requests a page load makes share one check.
 
         Args:
             filename (str): Name of the session file
@@ -406,9 +754,128 @@ class SessionManager:
             Session: Loaded session object or None if not found
         """
         filepath = os.path.join(self.config.upload_folder, filename)
+        now = time.monotonic()
+
+        with self._save_cond:
+            pending = self._pending_saves.get(filename) or self._saving.get(filename)
+        if pending is not None:
+            # Changes not yet written are newer than the file
+            return pending
+
+        with self._sessions_lock:
+            session = self._sessions.get(filename)
+            if session is not None:
+                self._sessions.move_to_end(filename)
+        if session is not None and (session._dirty
+                                    or now - session._validated_at < SESSION_REVALIDATE_INTERVAL):
+            # Unsaved changes are newer than the file, so don't re-read it
+            return session
 
-        if not os.path.exists(filepath):
+        signature = _file_signature(filepath)
+        if signature is None:
             logger.error(f"Session file not found: {filepath}")
+            with self._sessions_lock:
+                self._sessions.pop(filename, None)
             return None
 
-        return Session(self.config, filename)
\ No newline at end of file
+        if session is not None and session._signature == signature:
+            session._validated_at = now
+            return session
+
+        session = Session(self.config, filename)
+        session._validated_at = now
+        if session._signature is not None:
+            with self._sessions_lock:
+                self._sessions[filename] = session
+                self._sessions.move_to_end(filename)
+                while len(self._sessions) > SESSION_CACHE_MAXSIZE:
+                    self._sessions.popitem(last=False)
+        return session
+
+    def save_later(self, session):
+        """
+        Queue a changed session to be written by the background writer
+        after SAVE_DELAY seconds, so rapid autosaves cost one write.
+
+        Args:
+            session (Session): Session with unsaved changes
+        """
+        with self._save_cond:
+            self._pending_saves[session.filename] = session
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_pending, name='session-writer', daemon=True)
+                self._writer.start()
+            self._save_cond.notify()
+
+    def _write_pending(self):
+        """Background writer loop: wait for queued sessions, then save them."""
+        while True:
+            with self._save_cond:
+                while not self._pending_saves:
+                    self._save_cond.wait()
+            # Let further changes to the same sessions arrive before writing
+            time.sleep(SAVE_DELAY)
+            self.flush_saves()
+
+    def flush_saves(self, filename=None):
+        """
+        Write queued sessions now. Call before reading a session file from
+        disk (downloads, exports).
+
+        Args:
+            filename (str, optional): Only write this session; all if None
+
+        Returns:
+            bool: True if every written session was saved successfully
+        """
+        with self._save_cond:
+            if filename is None:
+                pending = list(self._pending_saves.values())
+                self._pending_saves.clear()
+            else:
+                session = self._pending_saves.pop(filename, None)
+                pending = [session] if session is not None else []
+            # Keep the sessions findable by load_session until they're written
+            for session in pending:
+                self._saving[session.filename] = session
+            generations = [self._generations.get(session.filename, 0) for session in pending]
+
+        saved = True
+        for session, generation in zip(pending, generations):
+            try:
+                if session._dirty and not session.save(self._current_save(session.filename, generation)):
+                    saved = False
+            finally:
+                with self._save_cond:
+                    if self._saving.get(session.filename) is session:
+                        del self._saving[session.filename]
+        return saved
+
+    @contextmanager
+    def _current_save(self, filename, generation):
+        """
+        Hold the save lock while the background writer replaces a session
+        file, yielding whether the file was discarded since the write began.
+
+        Args:
+            filename (str): Name of the session file
+            generation (int): Generation of the file when the write began
+        """
+        with self._save_cond:
+            yield self._generations.get(filename, 0) == generation
+
+    def discard_save(self, filename):
+        """
+        Drop a queued save, for a session file that is being deleted or
+        replaced. A save the background writer has already started is
+        abandoned before it replaces the file.
+
+        Args:
+            filename (str): Name of the session file
+        """
+        with self._save_cond:
+            self._pending_saves.pop(filename, None)
+            self._saving.pop(filename, None)
+            self._generations[filename] = self._generations.get(filename, 0) + 1
+        with self._sessions_lock:
+            self._sessions.pop(filename, None)
@@ -5,7 +5,7 @@ This package contains route modules that define the web application endpoints.
 Each module provides a blueprint that can be registered with the Flask application.
 """
 
-# Import route modules - these are imported explicitly to avoid circular imports
-from tomcat.routes import settings_routes, session_routes, media_routes
+# Route modules are not imported here; the application imports each one
+# explicitly when it is created, keeping `import tomcat.routes` cheap.
 
 __all__ = ['settings_routes', 'session_routes', 'media_routes']
\ No newline at end of file
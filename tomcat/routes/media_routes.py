@@ -5,14 +5,108 @@ This module handles all routes related to media serving and processing,
 including thumbnails, lowmag images, tilt series and tomogram animations.
 """
 import os
+import json
+import time
 import logging
-from flask import Blueprint, send_from_directory, jsonify, request
+import threading
+from collections import OrderedDict
+from flask import Blueprint, Response, send_file, jsonify, request, abort
+from werkzeug.security import safe_join
+from werkzeug.wsgi import FileWrapper
+from tomcat.utils.file_utils import cached_stat, invalidate_stat
 
 logger = logging.getLogger(__name__)
 
 # Create a Blueprint for media routes
 media_bp = Blueprint('media', __name__)
 
+# Read size for Werkzeug's fallback file wrapper (its default is 8 KiB)
+MEDIA_BUFFER_SIZE = 256 * 1024
+
+# media_type -> (config folder attribute, file extension, mimetype)
+_MEDIA_SPEC = {
+    'lowmag': ('lowmag_folder', '.jpg', 'image/jpeg'),
+    'tiltseries': ('tiltseries_folder', '.gif', 'image/gif'),
+    'tomogram': ('tomogram_folder', '.gif', 'image/gif'),
+}
+
+# serve_media queues a missing tomogram at most once per window, so a burst
+# of gallery requests for the same name doesn't re-enter the media manager
+QUEUE_DEDUPE_WINDOW = 5.0
+QUEUE_DEDUPE_MAXSIZE = 4096
+_recent_queue = OrderedDict()
+_recent_lock = threading.Lock()
+
+
+def _queue_once(media_manager, tomo_name):
+    """
+    Queue a tomogram for priority processing unless it was queued within
+    the last QUEUE_DEDUPE_WINDOW seconds.
+
+    Args:
+        media_manager: Media manager instance
+        tomo_name (str): Name of the tomogram
+
+    Returns:
+        bool: True if the tomogram was queued, False if skipped
+    """
+    now = time.monotonic()
+    with _recent_lock:
+        queued_at = _recent_queue.get(tomo_name)
+        if queued_at is not None and now - queued_at < QUEUE_DEDUPE_WINDOW:
+            return False
+        _recent_queue[tomo_name] = now
+        _recent_queue.move_to_end(tomo_name)
+        while len(_recent_queue) > QUEUE_DEDUPE_MAXSIZE:
+            _recent_queue.popitem(last=False)
+
+    media_manager.queue_tomogram_for_processing(tomo_name, priority=True)
+    return True
+
+
+def _send_media_file(file_path, st, mimetype=None):
+    """
+    Send a generated media file.
+    Media can be regenerated under the same name, so responses carry an ETag
+    (mtime in nanoseconds and size) and Last-Modified taken from the caller's
+    (cached) stat result with Cache-Control: no-cache, making browsers
+    revalidate on each use. Requests whose If-None-Match already matches get
+    an empty 304 without opening the file. Otherwise send_file stats the
+    path again for Content-Length and range handling and hands the file to
+    the server's wsgi.file_wrapper (sendfile under gunicorn/uWSGI), or, with
+    USE_X_SENDFILE, to the reverse proxy.
+
+    Args:
+        file_path (str): Absolute path of the file to send
+        st (os.stat_result): Stat result for the file, used for the cache headers
+        mimetype (str, optional): Mimetype of the response
+
+    Returns:
+        Response: Flask response for the file
+    """
+    etag = f"{st.st_mtime_ns}-{st.st_size}"
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.no_cache = True
+        return response
+
+    response = send_file(file_path, mimetype=mimetype, conditional=True,
+                         etag=etag, last_modified=st.st_mtime)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+
+    # The body is streamed from the open file block by block, never read into
+    # memory. Without a server-provided wsgi.file_wrapper (e.g. the Flask dev
+    # server), Werkzeug reads the file in small blocks; use bigger ones. Range
+    # responses wrap the same file wrapper.
+    body = getattr(response.response, 'iterable', response.response)
+    if type(body) is FileWrapper:
+        body.buffer_size = MEDIA_BUFFER_SIZE
+    return response
+
 
 def initialize_routes(config, media_manager):
     """
@@ -32,49 +126,39 @@ def initialize_routes(config, media_manager):
             media_type (str): Type of media ('lowmag', 'tiltseries', 'tomogram')
             tomo_name (str): Name of the tomogram
         """
-        if media_type == 'lowmag':
-            media_folder = config.lowmag_folder
-            filename = f"{tomo_name}.jpg"
-        elif media_type == 'tiltseries':
-            media_folder = config.tiltseries_folder
-            filename = f"{tomo_name}.gif"
-        elif media_type == 'tomogram':
-            media_folder = config.tomogram_folder
-            filename = f"{tomo_name}.gif"
-        else:
+        spec = _MEDIA_SPEC.get(media_type)
+        if spec is None:
             return "Invalid media type", 400
+        folder_attr, extension, mimetype = spec
+        media_folder = getattr(config, folder_attr)
+        filename = f"{tomo_name}{extension}"
 
-        # Make sure directory exists
-        os.makedirs(media_folder, exist_ok=True)
+        # Media folders are created by Config at startup and by the generators
+        # before writing, so reads never touch them here
 
         # Log the file path for debugging
         file_path = os.path.join(media_folder, filename)
         logger.info(f"Serving media from: {file_path}")
 
-        # Check if file exists and has content
-        if not os.path.exists(file_path):
-            logger.info(f"File does not exist: {file_path}")
-            # Set as priority since user is explicitly requesting it
-            media_manager.queue_tomogram_for_processing(tomo_name, priority=True)
+        # Check if file exists and has content with a single (cached) stat call
+        st = cached_stat(file_path)
+
+        if st is None or st.st_size == 0:
+            if st is None:
+                logger.info(f"File does not exist: {file_path}")
+            else:
+                logger.warning(f"File exists but is empty: {file_path}")
+                # Try to regenerate if the file is empty
+                os.remove(file_path)
+                invalidate_stat(file_path)
+            # Set as priority since user is explicitly requesting it (once per window)
+            _queue_once(media_manager, tomo_name)
             # Return a 202 Accepted response to indicate processing
             return "", 202
 
-        if os.path.getsize(file_path) == 0:
-            logger.warning(f"File exists but is empty: {file_path}")
-            # Try to regenerate if the file is empty
-            os.remove(file_path)
-            media_manager.queue_tomogram_for_processing(tomo_name, priority=True)
-            return "", 202
-
-        logger.info(f"Serving file: {file_path}, size: {os.path.getsize(file_path)} bytes")
+        logger.info(f"Serving file: {file_path}, size: {st.st_size} bytes")
 
-        # Set appropriate content type for the response
-        if filename.endswith('.gif'):
-            return send_from_directory(media_folder, filename, mimetype='image/gif')
-        elif filename.endswith('.jpg') or filename.endswith('.jpeg'):
-            return send_from_directory(media_folder, filename, mimetype='image/jpeg')
-        else:
-            return send_from_directory(media_folder, filename)
+        return _send_media_file(file_path, st, mimetype=mimetype)
 
     @media_bp.route('/media_status/<media_type>/<tomo_name>')
     def get_media_status(media_type, tomo_name):
@@ -86,7 +170,7 @@ def initialize_routes(config, media_manager):
             tomo_name (str): Name of the tomogram
         """
         status = media_manager.get_media_status(media_type, tomo_name)
-        return jsonify(status)
+        return Response(json.dumps(status, separators=(',', ':')), mimetype='application/json')
 
     @media_bp.route('/thumbnails/<filename>')
     def serve_thumbnail(filename):
@@ -96,7 +180,15 @@ def initialize_routes(config, media_manager):
         Args:
             filename (str): Name of the thumbnail file
         """
-        return send_from_directory(config.thumbnails_folder, filename)
+        file_path = safe_join(config.thumbnails_folder, filename)
+        if file_path is None:
+            abort(404)
+
+        st = cached_stat(file_path)
+        if st is None:
+            abort(404)
+
+        return _send_media_file(file_path, st)
 
     @media_bp.route('/thumbnail_status/<tomo_name>')
     def get_thumbnail_status(tomo_name):
@@ -122,7 +214,7 @@ def initialize_routes(config, media_manager):
         """
         Return the current progress of thumbnail downloads.
         """
-        return jsonify(media_manager.get_thumbnail_progress())
+        return Response(media_manager.get_thumbnail_progress_json(), mimetype='application/json')
 
     @media_bp.route('/process_tomograms', methods=['POST'])
     def process_tomograms():
@@ -4,22 +4,134 @@ Session Routes for TomCat Application
 This module handles all routes related to session management,
 including session creation, viewing, editing, and downloading.
 """
+import gzip
 import json
 import os
 import logging
+import shutil
 import tarfile
-import tempfile
+import time
 from datetime import datetime
 from flask import Blueprint, render_template, request, redirect, url_for, flash, send_from_directory, \
-    session as flask_session, jsonify, current_app
+    session as flask_session, jsonify, current_app, Response, abort
 from werkzeug.utils import secure_filename
+from tomcat.utils.file_utils import list_folder, invalidate_stat
+from tomcat.utils.thread_utils import JOB_TTL
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 
 logger = logging.getLogger(__name__)
 
 # Create a Blueprint for session routes
 session_bp = Blueprint('session', __name__)
 
+# Buffer size for copying files into exported archives and for the
+# compressed stream's writes (tarfile defaults to 16 KiB and 10 KiB)
+EXPORT_BUFFER_SIZE = 1024 * 1024
+
+# Imported members up to this size are read into memory and written to disk
+# by the import writers while the next ones are decompressed; larger members
+# are copied inline
+IMPORT_BUFFER_LIMIT = 8 * 1024 * 1024
+
+# Maximum number of buffered imported members waiting to be written
+IMPORT_MAX_PENDING = 32
+
+# Writers for imported files. Kept apart from the media thread pool so an
+# import never waits behind long-running GIF/MRC generation tasks
+IMPORT_WRITE_WORKERS = 2
+_import_writer = ThreadPoolExecutor(max_workers=IMPORT_WRITE_WORKERS, thread_name_prefix='import-writer')
+
+# Session file extensions recognised inside imported archives
+SESSION_FILE_SUFFIXES = ('.tomcat', '.csv')
+
+# gzip level for exported archives. The media inside are already compressed
+# (PNG/JPEG/GIF), so tarfile's fixed level 9 costs CPU for almost no gain
+EXPORT_COMPRESSLEVEL = 1
+
+
+class _ArchiveStream:
+    """
+    Write-only file object that collects what tarfile writes to it, so an
+    archive can be sent to the client in pieces as it is built.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """
+        Take everything written since the last call.
+
+        Returns:
+            bytes: The pending archive data
+        """
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _write_file(path, data):
+    """
+    Write bytes to a file.
+
+    Args:
+        path (str): Destination path
+        data (bytes): File contents
+    """
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _prefetch(paths):
+    """
+    Ask the kernel to start reading files that are about to be archived, so
+    their reads overlap with compressing the current ones. A no-op where
+    posix_fadvise isn't available.
+
+    Args:
+        paths (iterable): Paths of the files to read ahead
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def _prune_exports(folder, max_age):
+    """
+    Remove exported archives (and leftover partial ones) older than max_age.
+
+    Args:
+        folder (str): Exports folder
+        max_age (float): Age in seconds after which archives are removed
+    """
+    cutoff = time.time() - max_age
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+    except OSError as e:
+        logger.warning(f"Could not prune exports in {folder}: {str(e)}")
+
 
 def initialize_routes(config, session_manager_instance, file_locator_instance, media_manager_instance, allowed_file_func, thread_manager_instance):
     """
@@ -51,24 +163,154 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
     thread_manager = thread_manager_instance
 
 
-    def run_search_and_add(job_id, app_context, filename, basename):
-        """The actual search task that runs in a background thread."""
-        with app_context: # app_context provides access to current_app, config, etc.
-            try:
-                # Access session_manager and file_locator from the closure of initialize_routes
-                current_app.search_jobs[job_id]['status'] = 'running'
+    def run_search_and_add(job_id, jobs, filename, basename):
+        """
+        The actual search task that runs in a background thread. The job
+        store is passed in, so the task needs no app context.
+        """
+        try:
+            # Access session_manager and file_locator from the closure of initialize_routes
+            jobs.update(job_id, status='running')
 
-                session = session_manager.load_session(filename) # Uses session_manager from outer scope
-                search_results = file_locator.search_tomograms(basename) # Uses file_locator from outer scope
-                if search_results:
-                    session.add_tomograms_from_search(search_results)
+            session = session_manager.load_session(filename) # Uses session_manager from outer scope
+            search_results = file_locator.search_tomograms(basename) # Uses file_locator from outer scope
+            if search_results:
+                session.add_tomograms_from_search(search_results)
 
-                current_app.search_jobs[job_id]['status'] = 'complete'
-                current_app.search_jobs[job_id]['result_count'] = len(search_results) if search_results else 0
-            except Exception as e:
-                logger.error(f"Search job {job_id} failed: {e}")
-                current_app.search_jobs[job_id]['status'] = 'failed'
-                current_app.search_jobs[job_id]['error'] = str(e)
+            jobs.update(job_id, status='complete',
+                        result_count=len(search_results) if search_results else 0)
+        except Exception as e:
+            logger.error(f"Search job {job_id} failed: {e}")
+            jobs.update(job_id, status='failed', error=str(e))
+
+    # Archive folder -> destination folder for imported media members
+    import_media_folders = {'thumbnails': config.thumbnails_folder,
+                            'lowmag': config.lowmag_folder,
+                            'tiltseries': config.tiltseries_folder,
+                            'tomogram': config.tomogram_folder}
+
+    def import_destination(member):
+        """
+        Decide where an imported archive member is written. Only regular
+        files in the export layout are accepted; links, devices and any
+        other paths are skipped.
+
+        Args:
+            member (tarfile.TarInfo): Archive member
+
+        Returns:
+            tuple: (is_session, destination path), or (False, None) to skip it
+        """
+        if not member.isfile():
+            return False, None
+        parts = [part for part in member.name.split('/') if part not in ('', '.')]
+        if not parts:
+            return False, None
+        media_folder = import_media_folders.get(parts[0])
+        if media_folder is not None:
+            if len(parts) == 2 and parts[1] != '..':
+                return False, os.path.join(media_folder, parts[1])
+            return False, None
+        if parts[-1].endswith(SESSION_FILE_SUFFIXES):
+            return True, os.path.join(config.upload_folder, secure_filename(parts[-1]))
+        return False, None
+
+    def archive_chunks(filename, tomo_names):
+        """
+        Build a session archive, yielding the compressed data as it is
+        produced (after the session file and after each tomogram's media).
+
+        Args:
+            filename (str): Name of the session file
+            tomo_names (list): Names of the session's tomograms
+
+        Yields:
+            bytes: Next piece of the .tar.gz archive
+        """
+        # Look up thumbnails and list each media folder once, instead of
+        # probing every tomogram's files one by one
+        thumbnails = media_manager.get_thumbnail_paths(tomo_names)
+        media_files = [(config.lowmag_folder, 'lowmag', '.jpg', list_folder(config.lowmag_folder)),
+                       (config.tiltseries_folder, 'tiltseries', '.gif', list_folder(config.tiltseries_folder)),
+                       (config.tomogram_folder, 'tomogram', '.gif', list_folder(config.tomogram_folder))]
+
+        # Write any pending autosave before the session file is read
+        session_manager.flush_saves(filename)
+
+        stream = _ArchiveStream()
+
+        # Stream mode ("w|") writes sequentially, without seeking; the
+        # tar stream is compressed by GzipFile to choose the level
+        with gzip.GzipFile(fileobj=stream, mode="wb", compresslevel=EXPORT_COMPRESSLEVEL) as gz, \
+                tarfile.open(fileobj=gz, mode="w|", bufsize=EXPORT_BUFFER_SIZE) as tar:
+            # Set as an attribute: the open() keyword needs Python 3.8+
+            tar.copybufsize = EXPORT_BUFFER_SIZE
+
+            # Add session file
+            session_path = os.path.join(config.upload_folder, filename)
+            if os.path.exists(session_path):
+                tar.add(session_path, arcname=filename)
+                yield stream.drain()
+
+            # Collect each tomogram's files as (path, arcname) pairs
+            tomogram_files = []
+            for tomo_name in tomo_names:
+                if not tomo_name:  # Skip empty names
+                    continue
+                files = []
+
+                # Add thumbnail if exists
+                thumbnail_path = thumbnails.get(tomo_name)
+                if thumbnail_path:
+                    thumbnail_name = os.path.basename(thumbnail_path)
+                    files.append((thumbnail_path, f"thumbnails/{thumbnail_name}"))
+
+                # Add lowmag image, tilt series and tomogram if they exist
+                for media_folder, arcdir, extension, names in media_files:
+                    media_name = f"{tomo_name}{extension}"
+                    if media_name in names:
+                        files.append((os.path.join(media_folder, media_name), f"{arcdir}/{media_name}"))
+
+                tomogram_files.append(files)
+
+            for i, files in enumerate(tomogram_files):
+                # Start reading the next tomogram's files while this one is compressed
+                if i + 1 < len(tomogram_files):
+                    _prefetch(path for path, _ in tomogram_files[i + 1])
+
+                for path, arcname in files:
+                    tar.add(path, arcname=arcname)
+
+                # Hand over what this tomogram added before moving on
+                yield stream.drain()
+
+            # Add config.json if exists
+            if config.config_file and os.path.exists(config.config_file):
+                tar.add(config.config_file, arcname="config.json")
+
+        # Closing the archive writes the end-of-archive blocks and gzip trailer
+        yield stream.drain()
+
+    def run_export(job_id, jobs, filename, tomo_names):
+        """The export task that writes a session archive in a background thread."""
+        archive_path = os.path.join(config.exports_folder, f"{job_id}.tar.gz")
+        partial_path = f"{archive_path}.tmp"
+        try:
+            jobs.update(job_id, status='running')
+
+            with open(partial_path, 'wb') as f:
+                for chunk in archive_chunks(filename, tomo_names):
+                    f.write(chunk)
+            # Only complete archives appear under the final name
+            os.replace(partial_path, archive_path)
+
+            jobs.update(job_id, status='complete')
+            logger.info(f"Export job {job_id} wrote {archive_path}")
+        except Exception as e:
+            logger.error(f"Export job {job_id} failed: {e}")
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            jobs.update(job_id, status='failed', error=str(e))
 
     @session_bp.route('/', methods=['GET', 'POST'])
     def upload_file():
@@ -107,6 +349,8 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
             if file and allowed_file_func(file.filename):
                 filename = secure_filename(file.filename)
                 filepath = config.upload_folder + '/' + filename
+                # The upload replaces the file, so drop any pending autosave
+                session_manager.discard_save(filename)
                 file.save(filepath)
                 return redirect(url_for('session.process_csv', filename=filename))
 
@@ -116,6 +360,7 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
             if filename:
                 try:
                     filepath = os.path.join(config.upload_folder, filename)
+                    session_manager.discard_save(filename)
                     if os.path.exists(filepath):
                         os.remove(filepath)
                         flash(f"Session file '{filename}' deleted successfully")
@@ -164,14 +409,14 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
             return jsonify({'error': 'Search basename cannot be empty'}), 400
 
         job_id = str(uuid.uuid4())
-        current_app.search_jobs[job_id] = {'status': 'queued'}
+        current_app.search_jobs.set(job_id, status='queued')
 
         # Submit the task to the thread manager (now available from initialize_routes closure)
         thread_manager.submit_task(
             f"search_{job_id}",
             run_search_and_add,
             job_id,
-            current_app.app_context(), # Pass app context to background thread
+            current_app.search_jobs,  # The task only needs the job store, not an app context
             filename,
             basename
         )
@@ -201,28 +446,21 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
             if not data:
                 return jsonify({"status": "error", "message": "No data provided"}), 400
 
-            updates = data.get('updates', [])
-            updated_count = 0
-
-            # Defer saving until all updates are processed
-            with session.deferred_save():
-                for update in updates:
-                    tomo_name = update.get('tomo_name')
-                    if not tomo_name:
-                        continue
-
-                    # Update row in dataframe without saving immediately
-                    success = session.update_tomogram_data(
-                        tomo_name,
-                        thickness=update.get('thickness'),
-                        notes=update.get('notes'),
-                        delete=update.get('delete', False),
-                        score=update.get('score'),
-                        double_confirmed=update.get('double_confirmed', False)
-                    )
-
-                    if success:
-                        updated_count += 1
+            updates = [update for update in data.get('updates', []) if update.get('tomo_name')]
+
+            # Apply all updates column by column in memory; the session
+            # manager writes the file shortly after, once per burst of autosaves
+            updated_count = session.bulk_update_tomogram_data(
+                [update['tomo_name'] for update in updates],
+                save=False,
+                thickness=[update.get('thickness') for update in updates],
+                notes=[update.get('notes') for update in updates],
+                delete=[update.get('delete', False) for update in updates],
+                score=[update.get('score') for update in updates],
+                double_confirmed=[update.get('double_confirmed', False) for update in updates]
+            )
+            if updated_count:
+                session_manager.save_later(session)
 
             return jsonify({
                 "status": "success",
@@ -246,7 +484,7 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
             return redirect(url_for('session.upload_file'))
 
         df = session.get_data()
-        full_df = df.copy()  # Keep a copy of the original data
+        full_df = df  # Unfiltered data; only read for its length, so no copy
         search_results = None
         added_count = 0
         skipped_count = 0
@@ -265,7 +503,9 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
             if 'add_new_entry' in request.form:
                 new_tomo_name = request.form.get('new_tomo_name', '').strip()
                 if new_tomo_name:
-                    if session.add_tomogram(new_tomo_name):
+                    # Written behind the request, like autosave
+                    if session.add_tomogram(new_tomo_name, save=False):
+                        session_manager.save_later(session)
                         flash(f"Added new tomogram: {new_tomo_name}")
                         return redirect(url_for('session.process_csv', filename=filename)) # Redirect to refresh
                     else:
@@ -277,8 +517,7 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
 
         # Handle notes search
         if notes_query:
-            df['notes_str'] = df['notes'].fillna('').astype(str)
-            df = df[df['notes_str'].str.lower().str.contains(notes_query.lower())].drop(columns=['notes_str'])
+            df = df[session.get_notes_lower().str.contains(notes_query.lower(), regex=False)]
             if len(df) == 0:
                 flash(f"No tomograms found with notes containing '{notes_query}'")
 
@@ -297,11 +536,11 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
         iter_pages = None
         if total_pages > 1:
             iter_pages = []
-            # Show first page, last page, and pages around current page
-            pages_to_show = set([1, page - 2, page - 1, page, page + 1, page + 2, total_pages])
+            # Show first page, last page, and pages around current page; the
+            # candidates are already in order, so duplicates are adjacent
             last_p = 0
-            for p in sorted(list(pages_to_show)):
-                if p > 0 and p <= total_pages:
+            for p in (1, page - 2, page - 1, page, page + 1, page + 2, total_pages):
+                if last_p < p <= total_pages:
                     if last_p > 0 and last_p + 1 != p:
                         iter_pages.append(None)  # Ellipsis
                     iter_pages.append(p)
@@ -311,12 +550,8 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
         tomo_names = paginated_df['tomo_name'].tolist()
         media_manager.batch_process_tomograms(tomo_names)
 
-        thumbnails = {}
-        for tomo_name in tomo_names:
-            if tomo_name:
-                thumbnail_path = media_manager.get_thumbnail_path(tomo_name)
-                if thumbnail_path:
-                    thumbnails[tomo_name] = thumbnail_path.split('/')[-1]
+        thumbnails = {tomo_name: os.path.basename(thumbnail_path) for tomo_name, thumbnail_path
+                      in media_manager.get_thumbnail_paths(tomo_names).items()}
 
         return render_template('form.html',
                                df=paginated_df,
@@ -324,7 +559,7 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
                                filename=filename,
                                paths=config.paths,
                                thumbnails=thumbnails,
-                               tomo_names_json=json.dumps(tomo_names),
+                               tomo_names_json=json.dumps(tomo_names, separators=(',', ':')),
                                search_results=search_results,
                                added_count=added_count,
                                skipped_count=skipped_count,
@@ -394,13 +629,16 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
     @session_bp.route('/download/<filename>')
     def download_csv(filename):
         """Download session file."""
+        # Write any pending autosave first
+        session_manager.flush_saves(filename)
         return send_from_directory(config.upload_folder, filename, as_attachment=True)
 
     @session_bp.route('/export_session/<filename>', methods=['GET'])
     def export_session(filename):
         """
         Export session as a tarball including the CSV and all generated media files.
-        Creates a compressed archive with the session CSV and all related media.
+        The compressed archive is streamed to the client while it is built,
+        so nothing is written to disk and the download starts immediately.
 
         Args:
             filename (str): Name of the session file
@@ -414,62 +652,69 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
         # Get tomogram names
         tomo_names = session.get_tomogram_names()
 
-        # Create a temporary file for the tarball
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         tarball_filename = f"{os.path.splitext(filename)[0]}_{timestamp}.tar.gz"
-        tarball_path = os.path.join(tempfile.gettempdir(), tarball_filename)
 
-        try:
-            # Create tarball
-            with tarfile.open(tarball_path, "w:gz") as tar:
-                # Add session file
-                session_path = os.path.join(config.upload_folder, filename)
-                if os.path.exists(session_path):
-                    tar.add(session_path, arcname=filename)
-
-                # Add thumbnails
-                for tomo_name in tomo_names:
-                    if not tomo_name:  # Skip empty names
-                        continue
-
-                    # Add thumbnail if exists
-                    thumbnail_path = media_manager.get_thumbnail_path(tomo_name)
-                    if thumbnail_path and os.path.exists(thumbnail_path):
-                        thumbnail_name = os.path.basename(thumbnail_path)
-                        tar.add(thumbnail_path, arcname=f"thumbnails/{thumbnail_name}")
-
-                    # Add lowmag image if exists
-                    lowmag_path = os.path.join(config.lowmag_folder, f"{tomo_name}.jpg")
-                    if os.path.exists(lowmag_path):
-                        tar.add(lowmag_path, arcname=f"lowmag/{tomo_name}.jpg")
-
-                    # Add tilt series if exists
-                    tiltseries_path = os.path.join(config.tiltseries_folder, f"{tomo_name}.gif")
-                    if os.path.exists(tiltseries_path):
-                        tar.add(tiltseries_path, arcname=f"tiltseries/{tomo_name}.gif")
-
-                    # Add tomogram if exists
-                    tomogram_path = os.path.join(config.tomogram_folder, f"{tomo_name}.gif")
-                    if os.path.exists(tomogram_path):
-                        tar.add(tomogram_path, arcname=f"tomogram/{tomo_name}.gif")
-
-                # Add config.json if exists
-                if config.config_file and os.path.exists(config.config_file):
-                    tar.add(config.config_file, arcname="config.json")
-
-            # Move tarball to upload folder for downloading
-            download_path = os.path.join(config.upload_folder, tarball_filename)
-            os.rename(tarball_path, download_path)
-
-            flash(f"Session exported successfully as {tarball_filename}")
-
-            # Serve the tarball for download
-            return send_from_directory(config.upload_folder, tarball_filename, as_attachment=True)
+        def generate():
+            try:
+                yield from archive_chunks(filename, tomo_names)
+                logger.info(f"Session exported as {tarball_filename}")
+            except Exception as e:
+                # Headers are already sent, so the client sees a truncated download
+                logger.error(f"Error exporting session: {str(e)}")
 
-        except Exception as e:
-            logger.error(f"Error exporting session: {str(e)}")
-            flash(f"Error exporting session: {str(e)}")
-            return redirect(url_for('session.process_csv', filename=filename))
+        return Response(generate(), mimetype='application/gzip',
+                        headers={'Content-Disposition': f'attachment; filename="{tarball_filename}"'})
+
+    @session_bp.route('/start_export/<filename>', methods=['POST'])
+    def start_export(filename):
+        """
+        Start building a session archive in the background. The client polls
+        export_status and then fetches the archive from export_download, so
+        no request is held open while the archive is built.
+
+        Args:
+            filename (str): Name of the session file
+        """
+        session = session_manager.load_session(filename)
+        if not session:
+            return jsonify({'error': 'Session not found'}), 404
+
+        # Archives are kept as long as their jobs can be polled
+        _prune_exports(config.exports_folder, JOB_TTL)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        job_id = str(uuid.uuid4())
+        current_app.export_jobs.set(job_id, status='queued',
+                                    archive=f"{os.path.splitext(filename)[0]}_{timestamp}.tar.gz")
+
+        thread_manager.submit_task(
+            f"export_{job_id}",
+            run_export,
+            job_id,
+            current_app.export_jobs,
+            filename,
+            session.get_tomogram_names()
+        )
+
+        return jsonify({'job_id': job_id})
+
+    @session_bp.route('/export_status/<job_id>')
+    def export_status(job_id):
+        """Checks the status of a background export job."""
+        job = current_app.export_jobs.get(job_id)
+        if not job:
+            return jsonify({'status': 'not_found'}), 404
+        return jsonify(job)
+
+    @session_bp.route('/export_download/<job_id>')
+    def export_download(job_id):
+        """Download the archive of a completed export job."""
+        job = current_app.export_jobs.get(job_id)
+        if not job or job['status'] != 'complete':
+            abort(404)
+        return send_from_directory(config.exports_folder, f"{job_id}.tar.gz",
+                                   as_attachment=True, download_name=job['archive'])
 
     @session_bp.route('/import_archive', methods=['POST'])
     def import_archive():
@@ -490,89 +735,83 @@ def initialize_routes(config, session_manager_instance, file_locator_instance, m
             flash('Only .tar.gz or .tgz files are supported')
             return redirect(url_for('session.upload_file'))
 
-        # Create a temporary directory to extract files
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Save the uploaded file to the temp directory
-            archive_path = os.path.join(temp_dir, secure_filename(archive_file.filename))
-            archive_file.save(archive_path)
-
+        try:
+            session_filename = None
+
+            for folder in import_media_folders.values():
+                os.makedirs(folder, exist_ok=True)
+
+            # Read the uploaded archive in one sequential pass (stream mode,
+            # no index scan or seeks), straight from the request's upload
+            # stream without saving a copy first. Each wanted member is
+            # written to a hidden temporary file next to its destination and
+            # only moved into place once the whole archive has been read and
+            # holds a session file, so a rejected or failed import leaves
+            # existing files untouched.
+            # This thread decompresses while the import writers write
+            # finished members; at most IMPORT_MAX_PENDING buffers are in
+            # flight.
+            import_id = uuid.uuid4().hex
+            staged = deque()
+            pending_writes = deque()
+            written = 0
             try:
-                session_filename = None
-
-                # Extract the archive
-                with tarfile.open(archive_path, "r:gz") as tar:
-                    # First, find the session file
-                    for member in tar.getmembers():
-                        if member.name.endswith('.csv'):
-                            session_filename = os.path.basename(member.name)
-                            break
-
-                    if not session_filename:
-                        flash('No valid session file found in the archive')
-                        return redirect(url_for('session.upload_file'))
-
-                    # Extract all files
-                    tar.extractall(path=temp_dir)
-
-                # Copy session file to upload folder
-                session_path = os.path.join(temp_dir, session_filename)
-                if os.path.exists(session_path):
-                    import shutil
-                    shutil.copy2(session_path, os.path.join(config.upload_folder, session_filename))
-
-                # Create necessary directories if they don't exist
-                os.makedirs(config.thumbnails_folder, exist_ok=True)
-                os.makedirs(config.lowmag_folder, exist_ok=True)
-                os.makedirs(config.tiltseries_folder, exist_ok=True)
-                os.makedirs(config.tomogram_folder, exist_ok=True)
-
-                # Copy thumbnails
-                thumbnails_dir = os.path.join(temp_dir, 'thumbnails')
-                if os.path.exists(thumbnails_dir):
-                    for file in os.listdir(thumbnails_dir):
-                        src = os.path.join(thumbnails_dir, file)
-                        dst = os.path.join(config.thumbnails_folder, file)
-                        if os.path.isfile(src):
-                            import shutil
-                            shutil.copy2(src, dst)
-
-                # Copy lowmag images
-                lowmag_dir = os.path.join(temp_dir, 'lowmag')
-                if os.path.exists(lowmag_dir):
-                    for file in os.listdir(lowmag_dir):
-                        src = os.path.join(lowmag_dir, file)
-                        dst = os.path.join(config.lowmag_folder, file)
-                        if os.path.isfile(src):
-                            import shutil
-                            shutil.copy2(src, dst)
-
-                # Copy tilt series
-                tiltseries_dir = os.path.join(temp_dir, 'tiltseries')
-                if os.path.exists(tiltseries_dir):
-                    for file in os.listdir(tiltseries_dir):
-                        src = os.path.join(tiltseries_dir, file)
-                        dst = os.path.join(config.tiltseries_folder, file)
-                        if os.path.isfile(src):
-                            import shutil
-                            shutil.copy2(src, dst)
-
-                # Copy tomograms
-                tomogram_dir = os.path.join(temp_dir, 'tomogram')
-                if os.path.exists(tomogram_dir):
-                    for file in os.listdir(tomogram_dir):
-                        src = os.path.join(tomogram_dir, file)
-                        dst = os.path.join(config.tomogram_folder, file)
-                        if os.path.isfile(src):
-                            import shutil
-                            shutil.copy2(src, dst)
-
-                flash(f"Successfully imported session from archive: {session_filename}")
-                return redirect(url_for('session.process_csv', filename=session_filename))
+                with tarfile.open(fileobj=archive_file.stream, mode="r|gz") as tar:
+                    for member in tar:
+                        is_session, target = import_destination(member)
+                        if not target:
+                            continue
+                        if is_session:
+                            # Only the first session file is imported
+                            if session_filename:
+                                continue
+                            session_filename = os.path.basename(target)
+                        folder, name = os.path.split(target)
+                        temp = os.path.join(folder, f".{name}.{import_id}.{len(staged)}.part")
+                        staged.append((temp, target))
+                        with tar.extractfile(member) as src:
+                            if member.size <= IMPORT_BUFFER_LIMIT:
+                                pending_writes.append(_import_writer.submit(_write_file, temp, src.read()))
+                                if len(pending_writes) > IMPORT_MAX_PENDING:
+                                    pending_writes.popleft().result()
+                            else:
+                                with open(temp, 'wb') as dst:
+                                    shutil.copyfileobj(src, dst, EXPORT_BUFFER_SIZE)
+
+                # Wait for the remaining writes (re-raising the first failure)
+                while pending_writes:
+                    pending_writes.popleft().result()
+
+                if not session_filename:
+                    flash('No valid session file found in the archive')
+                    return redirect(url_for('session.upload_file'))
+
+                # The imported file replaces any pending autosave
+                session_manager.discard_save(session_filename)
+                while staged:
+                    temp, target = staged.popleft()
+                    os.replace(temp, target)
+                    invalidate_stat(target)
+                    written += 1
+            finally:
+                # Remove the temporary files of a rejected or failed import,
+                # once no writer can still be creating them
+                wait(pending_writes)
+                for temp, _ in staged:
+                    try:
+                        os.remove(temp)
+                    except OSError:
+                        pass
+
+            logger.info(f"Imported {written} files from archive")
+
+            flash(f"Successfully imported session from archive: {session_filename}")
+            return redirect(url_for('session.process_csv', filename=session_filename))
 
-            except Exception as e:
-                logger.error(f"Error importing archive: {str(e)}")
-                flash(f"Error importing archive: {str(e)}")
-                return redirect(url_for('session.upload_file'))
+        except Exception as e:
+            logger.error(f"Error importing archive: {str(e)}")
+            flash(f"Error importing archive: {str(e)}")
+            return redirect(url_for('session.upload_file'))
 
     # Return the blueprint - not strictly necessary but helps with clarity
     return session_bp
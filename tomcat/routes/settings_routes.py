@@ -71,17 +71,18 @@ def initialize_routes(config):
             # Get parent directory
             parent_dir = os.path.dirname(current_path)
 
-            # List directories and files
+            # List directories and files in a single scan; directory entries
+            # already know their type, so only files need a stat for the size
             items = []
-            for item in os.listdir(current_path):
-                item_path = os.path.join(current_path, item)
-                is_dir = os.path.isdir(item_path)
-                items.append({
-                    'name': item,
-                    'path': item_path,
-                    'is_directory': is_dir,
-                    'size': os.path.getsize(item_path) if not is_dir else 0
-                })
+            with os.scandir(current_path) as entries:
+                for entry in entries:
+                    is_dir = entry.is_dir()
+                    items.append({
+                        'name': entry.name,
+                        'path': entry.path,
+                        'is_directory': is_dir,
+                        'size': entry.stat().st_size if not is_dir else 0
+                    })
 
             # Sort: directories first, then files
             items.sort(key=lambda x: (not x['is_directory'], x['name'].lower()))
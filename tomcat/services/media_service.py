@@ -5,12 +5,19 @@ This module handles all media-related operations including generation of
 thumbnails, animations, and other visualizations.
 """
 import os
+import json
 import logging
 import glob
+import threading
 from collections import OrderedDict
 
 # Import from utils package
-from tomcat.utils.file_utils import FileLocator
+from tomcat.utils.file_utils import FileLocator, cached_stat, invalidate_stat, list_folder
+from tomcat.utils.media_utils import (
+    generate_jpeg_thumbnail,
+    generate_tiltseries_animation,
+    generate_tomogram_animation
+)
 
 logger = logging.getLogger(__name__)
 
@@ -36,9 +43,21 @@ class MediaManager:
         # Media status tracking
         self.media_status = {}
 
+        # Directories known to exist, so repeat requests skip os.makedirs
+        self._created_dirs = set()
+
         # Ordered list of tomograms to process (maintains processing order)
         self.processing_queue = OrderedDict()
 
+        # Guards processing_queue and _starting, which are used from request
+        # threads and from worker threads as generation tasks finish. Only
+        # held for queue bookkeeping, never for file lookups or submits
+        self._queue_lock = threading.Lock()
+
+        # Tomograms taken off the queue whose tasks aren't submitted yet; they
+        # count against the free workers so concurrent drains don't overfill
+        self._starting = 0
+
         # Thumbnail progress tracking
         self.thumbnail_progress = {
             'total': 0,
@@ -49,6 +68,21 @@ class MediaManager:
             'thumbnail_paths': {}  # Dictionary to map tomo_name to its thumbnail path
         }
 
+        # Last encoded thumbnail progress, as (state key, JSON bytes)
+        self._progress_json = (None, b'')
+
+    def ensure_directory(self, directory):
+        """
+        Create a directory if it doesn't exist yet. Directories are remembered
+        once created, so repeated calls for the same path do no syscalls.
+
+        Args:
+            directory (str): Path of the directory to create
+        """
+        if directory not in self._created_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._created_dirs.add(directory)
+
     def queue_tomogram_for_processing(self, tomo_name, priority=False):
         """
         Add a tomogram to the processing queue.
@@ -60,55 +94,78 @@ class MediaManager:
         Returns:
             bool: True if queued, False if already in queue
         """
-        if tomo_name in self.processing_queue:
-            return False
+        with self._queue_lock:
+            queued = tomo_name not in self.processing_queue
+            if queued:
+                self.processing_queue[tomo_name] = True
 
-        # If priority, add to front, otherwise add to end
-        if priority:
-            # Create a new OrderedDict with this item first, then add all others
-            new_queue = OrderedDict([(tomo_name, True)])
-            new_queue.update(self.processing_queue)
-            self.processing_queue = new_queue
-        else:
-            self.processing_queue[tomo_name] = True
+            # If priority, move to the front (also for a tomogram that was
+            # already waiting further back)
+            if priority:
+                self.processing_queue.move_to_end(tomo_name, last=False)
 
-        # Only process the queue immediately if we haven't been called from within process_queue
-        # This avoids potential recursion issues
-        if not getattr(self, '_processing_queue_active', False):
-            try:
-                self._processing_queue_active = True
-                self.process_queue()
-            finally:
-                self._processing_queue_active = False
+        if queued or priority:
+            self.process_queue()
 
-        return True
+        return queued
 
-    def process_queue(self):
+    def process_queue(self, force=True, finishing=False):
         """
         Process tomograms in the queue, starting media generation for each.
         This is non-blocking as it schedules background tasks.
-        """
-        # Maximum number of active tasks to start at once
-        max_to_start = max(1, self.thread_manager.max_workers - self.thread_manager.get_active_task_count())
-        started = 0
-
-        # Process items in the queue order
-        queue_keys = list(self.processing_queue.keys())
 
-        for tomo_name in queue_keys:
-            # Start media generation
-            if started < max_to_start:
+        Args:
+            force (bool): If True, start at least one tomogram even when all
+                          workers are busy (used when a tomogram is queued)
+            finishing (bool): True when called by a generation task that is
+                              about to finish, which doesn't count as active
+        """
+        # Count the active tasks before taking the lock; it doesn't guard them
+        active = max(0, self.thread_manager.get_active_task_count() - (1 if finishing else 0))
+
+        with self._queue_lock:
+            # Maximum number of tomograms to start at once
+            free_workers = self.thread_manager.max_workers - active - self._starting
+            max_to_start = max(1, free_workers) if force else free_workers
+
+            # Take items from the front of the queue in order; the rest stay
+            # queued until a running task finishes
+            to_start = []
+            while self.processing_queue and len(to_start) < max_to_start:
+                tomo_name, _ = self.processing_queue.popitem(last=False)
+                to_start.append(tomo_name)
+            self._starting += len(to_start)
+
+        # Look up the source files and submit outside the lock
+        for tomo_name in to_start:
+            try:
                 # Use internal method to avoid recursion
                 self._generate_media_for_tomogram_internal(tomo_name)
-                started += 1
-                # Remove from queue once processed
-                del self.processing_queue[tomo_name]
-            else:
-                # Leave the rest in the queue for next time
-                break
+            finally:
+                with self._queue_lock:
+                    self._starting -= 1
 
-        # Clean up completed tasks
-        self.thread_manager.cleanup_completed_tasks()
+    def _submit_media_task(self, task_key, func, *args):
+        """
+        Submit a media generation task that dispatches the next queued
+        tomograms once it finishes, so the queue keeps draining after a batch
+        without waiting for another request.
+
+        Args:
+            task_key (str): Unique key to identify the task
+            func (callable): Generation method to run
+            *args: Arguments for the generation method
+
+        Returns:
+            bool: True if task was submitted, False if already running
+        """
+        def run():
+            try:
+                return func(*args)
+            finally:
+                self.process_queue(force=False, finishing=True)
+
+        return self.thread_manager.submit_task(task_key, run)
 
     def batch_process_tomograms(self, tomo_list):
         """
@@ -121,11 +178,26 @@ class MediaManager:
         # Update total count for tracking
         self.thumbnail_progress['total'] = len(tomo_list)
 
+        # List each output folder once instead of probing every name, and
+        # skip tomograms whose media are all present already
+        thumbnails = list_folder(self.config.thumbnails_folder)
+        expected = [(thumbnails, '.png')]
+        if self.config.paths['lowmag_path']:
+            expected.append((list_folder(self.config.lowmag_folder), '.jpg'))
+        if self.config.paths['tiltseries_path']:
+            expected.append((list_folder(self.config.tiltseries_folder), '.gif'))
+        if self.config.paths['tomogram_path']:
+            expected.append((list_folder(self.config.tomogram_folder), '.gif'))
+
         # Queue each tomogram in order
+        queued = 0
         for tomo_name in tomo_list:
+            if all(f"{tomo_name}{ext}" in names for names, ext in expected):
+                continue
             self.queue_tomogram_for_processing(tomo_name)
+            queued += 1
 
-        logger.info(f"Queued {len(tomo_list)} tomograms for processing")
+        logger.info(f"Queued {queued} of {len(tomo_list)} tomograms for processing")
 
     def _generate_media_for_tomogram_internal(self, tomo_name):
         """
@@ -174,7 +246,7 @@ class MediaManager:
                 output_file = os.path.join(self.config.thumbnails_folder, f"{tomo_name}.png")
 
                 # Submit thumbnail generation task
-                self.thread_manager.submit_task(
+                self._submit_media_task(
                     f"thumbnail_{tomo_name}",
                     self._generate_thumbnail,
                     tomo_name, tomogram_file, output_file
@@ -196,7 +268,7 @@ class MediaManager:
             self.media_status[f"lowmag_{tomo_name}"] = "generating"
 
             # Submit lowmag generation task
-            self.thread_manager.submit_task(
+            self._submit_media_task(
                 f"lowmag_{tomo_name}",
                 self._generate_lowmag_image,
                 tomo_name
@@ -218,7 +290,7 @@ class MediaManager:
             self.media_status[f"tiltseries_{tomo_name}"] = "generating"
 
             # Submit tilt series generation task
-            self.thread_manager.submit_task(
+            self._submit_media_task(
                 f"tiltseries_{tomo_name}",
                 self._generate_tiltseries_animation,
                 tomo_name
@@ -240,7 +312,7 @@ class MediaManager:
             self.media_status[f"tomogram_{tomo_name}"] = "generating"
 
             # Submit tomogram generation task
-            self.thread_manager.submit_task(
+            self._submit_media_task(
                 f"tomogram_{tomo_name}",
                 self._generate_tomogram_animation,
                 tomo_name
@@ -271,13 +343,14 @@ class MediaManager:
             self.thumbnail_progress['status'] = 'generating'
             self.thumbnail_progress['message'] = f'Generating thumbnail for {tomo_name}'
 
-            # Use utils.py function to generate the thumbnail
-            from tomcat.utils import generate_jpeg_thumbnail
+            # Use media_utils function to generate the thumbnail
             success = generate_jpeg_thumbnail(source_file, output_file, min_side=150)
+            invalidate_stat(output_file)
 
             if success:
-                # Verify the thumbnail was actually created
-                if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
+                # Verify the thumbnail was actually created (one stat, which also primes the cache)
+                st = cached_stat(output_file)
+                if st is not None and st.st_size > 0:
                     # Update progress tracking
                     self.thumbnail_progress['status'] = 'success'
                     self.thumbnail_progress['message'] = f'Generated thumbnail for {tomo_name}'
@@ -325,13 +398,14 @@ class MediaManager:
                 return False
 
             # Make sure output directory exists
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            self.ensure_directory(os.path.dirname(output_file))
 
-            # Use utils.py functions to generate the JPEG image
-            from tomcat.utils import generate_jpeg_thumbnail
+            # Use media_utils functions to generate the JPEG image
             success = generate_jpeg_thumbnail(lowmag_file, output_file, min_side=384)
+            invalidate_stat(output_file)
+            st = cached_stat(output_file)
 
-            if success and os.path.exists(output_file) and os.path.getsize(output_file) > 0:
+            if success and st is not None and st.st_size > 0:
                 logger.info(f"Successfully generated lowmag image for {tomo_name}")
                 self.media_status[f"lowmag_{tomo_name}"] = "ready"
                 return True
@@ -339,8 +413,9 @@ class MediaManager:
                 logger.error(f"Failed to generate lowmag image for {tomo_name}")
                 self.media_status[f"lowmag_{tomo_name}"] = "error"
                 # Clean up empty file if it exists
-                if os.path.exists(output_file) and os.path.getsize(output_file) == 0:
+                if st is not None and st.st_size == 0:
                     os.remove(output_file)
+                    invalidate_stat(output_file)
                 return False
 
         except Exception as e:
@@ -349,6 +424,7 @@ class MediaManager:
             # Clean up output file if it exists but generation failed
             if os.path.exists(output_file):
                 os.remove(output_file)
+                invalidate_stat(output_file)
             return False
 
     def _generate_tiltseries_animation(self, tomo_name):
@@ -375,26 +451,28 @@ class MediaManager:
             logger.info(f"Found tilt series file for {tomo_name}: {tiltseries_file}")
 
             # Make sure output directory exists
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            self.ensure_directory(os.path.dirname(output_file))
 
             logger.info(f"Generating tilt series animation for {tomo_name} to {output_file}")
 
-            # Use utils.py functions to generate the animation
-            from tomcat.utils import generate_tiltseries_animation as utils_generate_animation
-            success = utils_generate_animation(tiltseries_file, output_file, min_side=384)
+            # Use media_utils functions to generate the animation
+            success = generate_tiltseries_animation(tiltseries_file, output_file, min_side=384)
+            invalidate_stat(output_file)
+            st = cached_stat(output_file)
 
             # Check if the file was created and has content
-            if success and os.path.exists(output_file) and os.path.getsize(output_file) > 0:
+            if success and st is not None and st.st_size > 0:
                 logger.info(
-                    f"Successfully generated tilt series animation for {tomo_name}, size: {os.path.getsize(output_file)} bytes")
+                    f"Successfully generated tilt series animation for {tomo_name}, size: {st.st_size} bytes")
                 self.media_status[f"tiltseries_{tomo_name}"] = "ready"
                 return True
             else:
-                if os.path.exists(output_file):
+                if st is not None:
                     logger.error(
-                        f"Generated file exists but is empty: {output_file}, size: {os.path.getsize(output_file)} bytes")
+                        f"Generated file exists but is empty: {output_file}, size: {st.st_size} bytes")
                     # Remove empty file
                     os.remove(output_file)
+                    invalidate_stat(output_file)
                 else:
                     logger.error(f"Failed to generate file: {output_file}")
                 self.media_status[f"tiltseries_{tomo_name}"] = "error"
@@ -406,6 +484,7 @@ class MediaManager:
             # Clean up output file if it exists but generation failed
             if os.path.exists(output_file):
                 os.remove(output_file)
+                invalidate_stat(output_file)
             return False
 
     def _generate_tomogram_animation(self, tomo_name):
@@ -432,26 +511,28 @@ class MediaManager:
             logger.info(f"Found tomogram file for {tomo_name}: {tomogram_file}")
 
             # Make sure output directory exists
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            self.ensure_directory(os.path.dirname(output_file))
 
             logger.info(f"Generating tomogram animation for {tomo_name} to {output_file}")
 
-            # Use utils.py functions to generate the animation
-            from tomcat.utils import generate_tomogram_animation as utils_generate_animation
-            success = utils_generate_animation(tomogram_file, output_file, min_side=384)
+            # Use media_utils functions to generate the animation
+            success = generate_tomogram_animation(tomogram_file, output_file, min_side=384)
+            invalidate_stat(output_file)
+            st = cached_stat(output_file)
 
             # Check if the file was created and has content
-            if success and os.path.exists(output_file) and os.path.getsize(output_file) > 0:
+            if success and st is not None and st.st_size > 0:
                 logger.info(
-                    f"Successfully generated tomogram animation for {tomo_name}, size: {os.path.getsize(output_file)} bytes")
+                    f"Successfully generated tomogram animation for {tomo_name}, size: {st.st_size} bytes")
                 self.media_status[f"tomogram_{tomo_name}"] = "ready"
                 return True
             else:
-                if os.path.exists(output_file):
+                if st is not None:
                     logger.error(
-                        f"Generated file exists but is empty: {output_file}, size: {os.path.getsize(output_file)} bytes")
+                        f"Generated file exists but is empty: {output_file}, size: {st.st_size} bytes")
                     # Remove empty file
                     os.remove(output_file)
+                    invalidate_stat(output_file)
                 else:
                     logger.error(f"Failed to generate file: {output_file}")
                 self.media_status[f"tomogram_{tomo_name}"] = "error"
@@ -463,6 +544,7 @@ class MediaManager:
             # Clean up output file if it exists but generation failed
             if os.path.exists(output_file):
                 os.remove(output_file)
+                invalidate_stat(output_file)
             return False
 
     def get_media_status(self, media_type, tomo_name):
@@ -494,20 +576,23 @@ class MediaManager:
         # Check if the media file exists
         media_file = os.path.join(media_folder, f"{tomo_name}{file_extension}")
 
-        if os.path.exists(media_file) and os.path.getsize(media_file) > 0:
+        st = cached_stat(media_file)
+
+        # Read the shared status once; it is only written on a transition below
+        status = self.media_status.get(status_key, "unknown")
+
+        if st is not None and st.st_size > 0:
             # File exists and has content, it's ready
             logger.debug(f"Media file is ready: {media_file}")
             return {
                 "status": "ready",
-                "reload": self.media_status.get(status_key) == "generating",  # Reload if we were previously generating
-                "size": os.path.getsize(media_file)
+                "reload": status == "generating",  # Reload if we were previously generating
+                "size": st.st_size
             }
 
-        # Check the status
-        status = self.media_status.get(status_key, "unknown")
-
-        # If status is unknown but the file should be generating, update status and queue it
-        if status == "unknown" and not os.path.exists(media_file):
+        # If status is unknown (or a stale "ready" whose file has since been
+        # removed) and there is no file, update status and queue it
+        if status in ("unknown", "ready") and st is None:
             self.media_status[status_key] = "generating"
             self.queue_tomogram_for_processing(tomo_name, priority=True)  # Priority since user is requesting it
             status = "generating"
@@ -515,8 +600,8 @@ class MediaManager:
         return {
             "status": status,
             "reload": False,
-            "file_exists": os.path.exists(media_file),
-            "file_size": os.path.getsize(media_file) if os.path.exists(media_file) else 0
+            "file_exists": st is not None,
+            "file_size": st.st_size if st is not None else 0
         }
 
     def get_thumbnail_path(self, tomo_name):
@@ -534,6 +619,11 @@ class MediaManager:
             thumbnail_filename = self.thumbnail_progress['thumbnail_paths'][tomo_name]
             return os.path.join(self.config.thumbnails_folder, thumbnail_filename)
 
+        # Generated thumbnails are named after the tomogram, so check that path first
+        thumbnail_path = os.path.join(self.config.thumbnails_folder, f"{tomo_name}.png")
+        if cached_stat(thumbnail_path) is not None:
+            return thumbnail_path
+
         # Use file locator to find thumbnail
         thumbnail_path = self.file_locator.find_thumbnail(tomo_name, self.config.thumbnails_folder)
 
@@ -543,6 +633,49 @@ class MediaManager:
 
         return thumbnail_path
 
+    def get_thumbnail_paths(self, tomo_names):
+        """
+        Get thumbnail paths for several tomograms with a single scan of the
+        thumbnails folder. Tomograms without a thumbnail are queued for
+        generation, as with get_thumbnail_path.
+
+        Args:
+            tomo_names (list): Names of the tomograms
+
+        Returns:
+            dict: Mapping of tomo_name to thumbnail path, for tomograms that have one
+        """
+        thumbnails_folder = self.config.thumbnails_folder
+        known = self.thumbnail_progress['thumbnail_paths']
+        thumbnail_files = None
+        paths = {}
+
+        for tomo_name in tomo_names:
+            if not tomo_name:
+                continue
+
+            # Check cached paths first
+            if tomo_name in known:
+                paths[tomo_name] = os.path.join(thumbnails_folder, known[tomo_name])
+                continue
+
+            if thumbnail_files is None:
+                thumbnail_files = sorted(name for name in list_folder(thumbnails_folder)
+                                         if name.endswith('.png'))
+                thumbnail_set = set(thumbnail_files)
+
+            # Prefer the generated name, then any "<tomo_name>*.png" like find_thumbnail
+            filename = f"{tomo_name}.png"
+            if filename not in thumbnail_set:
+                filename = next((name for name in thumbnail_files if name.startswith(tomo_name)), None)
+
+            if filename:
+                paths[tomo_name] = os.path.join(thumbnails_folder, filename)
+            else:
+                self.queue_tomogram_for_processing(tomo_name)
+
+        return paths
+
     def get_thumbnail_progress(self):
         """
         Get the current progress of thumbnail generation.
@@ -550,4 +683,24 @@ class MediaManager:
         Returns:
             dict: Thumbnail generation progress information
         """
-        return self.thumbnail_progress
\ No newline at end of file
+        return self.thumbnail_progress
+
+    def get_thumbnail_progress_json(self):
+        """
+        Get the thumbnail progress encoded as compact JSON. The encoding is
+        reused until the progress changes, so repeated polls don't walk the
+        growing completed_names/thumbnail_paths collections again.
+
+        Returns:
+            bytes: JSON-encoded thumbnail generation progress
+        """
+        progress = self.thumbnail_progress
+        # completed_names and thumbnail_paths only grow together with 'downloaded'
+        state = (progress['status'], progress['message'], progress['total'],
+                 progress['downloaded'], len(progress['completed_names']))
+
+        cached_state, encoded = self._progress_json
+        if cached_state != state:
+            encoded = json.dumps(progress, separators=(',', ':')).encode()
+            self._progress_json = (state, encoded)
+        return encoded
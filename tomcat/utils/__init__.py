@@ -1,8 +1,8 @@
 """
 Utility functions for the TomCat application.
 """
-from tomcat.utils.file_utils import extract_basename, FileLocator
-from tomcat.utils.thread_utils import ThreadManager
+from tomcat.utils.file_utils import extract_basename, FileLocator, cached_stat, invalidate_stat, list_folder
+from tomcat.utils.thread_utils import ThreadManager, JobStore, get_thread_manager
 from tomcat.utils.media_utils import (
     generate_jpeg_thumbnail,
     generate_tiltseries_animation,
@@ -11,7 +11,12 @@ from tomcat.utils.media_utils import (
 __all__ = [
     'extract_basename', 
     'FileLocator', 
+    'cached_stat',
+    'invalidate_stat',
+    'list_folder',
     'ThreadManager',
+    'JobStore',
+    'get_thread_manager',
     'generate_jpeg_thumbnail',
     'generate_tiltseries_animation',
     'generate_tomogram_animation'
@@ -6,11 +6,79 @@ finding and identifying tomogram files.
 """
 import os
 import re
+import time
 import logging
 import glob
+import threading
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
+# Process-wide stat cache for generated media paths: absolute path -> (expiry, stat result or None)
+STAT_CACHE_TTL = 2.0
+STAT_CACHE_MAXSIZE = 8192
+_stat_cache = OrderedDict()
+_stat_lock = threading.Lock()
+
+
+def cached_stat(path):
+    """
+    Stat a file through a short-lived, process-wide cache, so bursts of
+    gallery requests for the same paths collapse into one syscall per path
+    every few seconds. Missing files are cached too.
+
+    Args:
+        path (str): Path of the file to stat
+
+    Returns:
+        os.stat_result or None: Stat result, or None if the file doesn't exist
+    """
+    now = time.monotonic()
+    with _stat_lock:
+        entry = _stat_cache.get(path)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        st = None
+
+    with _stat_lock:
+        _stat_cache[path] = (now + STAT_CACHE_TTL, st)
+        _stat_cache.move_to_end(path)
+        while len(_stat_cache) > STAT_CACHE_MAXSIZE:
+            _stat_cache.popitem(last=False)
+    return st
+
+
+def invalidate_stat(path):
+    """
+    Drop a path from the stat cache after it has been written or removed.
+
+    Args:
+        path (str): Path of the file that changed
+    """
+    with _stat_lock:
+        _stat_cache.pop(path, None)
+
+
+def list_folder(folder):
+    """
+    List the files in a folder with a single directory scan.
+
+    Args:
+        folder (str): Path to the folder
+
+    Returns:
+        set: File names in the folder, empty if it doesn't exist
+    """
+    try:
+        with os.scandir(folder) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+    except FileNotFoundError:
+        return set()
+
 
 def extract_basename(filename):
     """
@@ -74,6 +142,9 @@ class FileLocator:
     # Priority order for file types (higher index = higher priority)
     TYPE_PRIORITY = {'lowmag': 1, 'tiltseries': 2, 'tomogram': 3}
 
+    # Seconds a directory tree listing is reused before walking it again
+    LISTING_TTL = 30.0
+
     def __init__(self, config):
         """
         Initialize FileLocator with application configuration.
@@ -83,6 +154,37 @@ class FileLocator:
         """
         self.config = config
 
+        # Directory tree listings: {directory: (expires_at, mtime_ns, [(root, filename), ...])}
+        self._listings = {}
+
+    def _list_files(self, directory, refresh=False):
+        """
+        List every file under a directory, reusing the previous walk while
+        the directory is unchanged and the listing is younger than LISTING_TTL.
+        Only the top-level mtime is checked, so files added deeper in the
+        tree show up once the TTL expires.
+
+        Args:
+            directory (str): Directory to list
+            refresh (bool): If True, always walk the directory again
+
+        Returns:
+            list: (root, filename) tuples for the files under the directory
+        """
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return []
+
+        now = time.monotonic()
+        cached = self._listings.get(directory)
+        if not refresh and cached and cached[0] > now and cached[1] == mtime_ns:
+            return cached[2]
+
+        files = [(root, file) for root, dirs, names in os.walk(directory) for file in names]
+        self._listings[directory] = (now + self.LISTING_TTL, mtime_ns, files)
+        return files
+
     def find_tomogram_file(self, tomo_name):
         """
         Find tomogram file for a specific tomogram name.
@@ -170,22 +272,21 @@ class FileLocator:
                 logger.debug(f"Found exact match: {file_path}")
                 return file_path
 
-        # Collect all candidate files first
+        # Collect all candidate files first (from the cached directory listing)
         candidates = []
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                file_lower = file.lower()
-                # Check if file has one of the allowed extensions AND contains the tomogram name
-                if tomo_name.lower() in file_lower:
-                    for ext in sorted_extensions:
-                        if file_lower.endswith(ext.lower()):
-                            candidates.append({
-                                'file': file,
-                                'path': os.path.join(root, file),
-                                'ext': ext,
-                                'basename': extract_basename(file)
-                            })
-                            break  # Once we've matched an extension, don't check others
+        for root, file in self._list_files(directory):
+            file_lower = file.lower()
+            # Check if file has one of the allowed extensions AND contains the tomogram name
+            if tomo_name.lower() in file_lower:
+                for ext in sorted_extensions:
+                    if file_lower.endswith(ext.lower()):
+                        candidates.append({
+                            'file': file,
+                            'path': os.path.join(root, file),
+                            'ext': ext,
+                            'basename': extract_basename(file)
+                        })
+                        break  # Once we've matched an extension, don't check others
 
         # Process candidates in priority order
         if candidates:
@@ -232,26 +333,27 @@ class FileLocator:
             if not path or not os.path.exists(path):
                 continue
 
-            for root, dirs, files in os.walk(path):
-                for file in files:
-                    if basename.lower() in file.lower() and any(
-                            file.lower().endswith(ext.lower()) for ext in extensions):
-                        # Extract proper basename
-                        tomo_name = extract_basename(file)
-
-                        # Check if we should replace an existing entry
-                        should_replace = (
-                                tomo_name not in results_dict or
-                                self.TYPE_PRIORITY.get(file_type, 0) > self.TYPE_PRIORITY.get(
-                            results_dict[tomo_name]['type'], 0)
-                        )
-
-                        if should_replace:
-                            results_dict[tomo_name] = {
-                                'name': tomo_name,
-                                'path': os.path.join(root, file),
-                                'type': file_type,
-                                'filename': file
-                            }
+            # A search always walks the tree again; the fresh listing is then
+            # reused by the find_*_file lookups for the tomograms it adds
+            for root, file in self._list_files(path, refresh=True):
+                if basename.lower() in file.lower() and any(
+                        file.lower().endswith(ext.lower()) for ext in extensions):
+                    # Extract proper basename
+                    tomo_name = extract_basename(file)
+
+                    # Check if we should replace an existing entry
+                    should_replace = (
+                            tomo_name not in results_dict or
+                            self.TYPE_PRIORITY.get(file_type, 0) > self.TYPE_PRIORITY.get(
+                        results_dict[tomo_name]['type'], 0)
+                    )
+
+                    if should_replace:
+                        results_dict[tomo_name] = {
+                            'name': tomo_name,
+                            'path': os.path.join(root, file),
+                            'type': file_type,
+                            'filename': file
+                        }
         # Convert dictionary to list for return
         return list(results_dict.values())
@@ -5,6 +5,7 @@ This module provides utility functions for media operations including
 generating thumbnails, animations, and other visualizations from MRC files.
 """
 import os
+import stat
 import sys
 import logging
 import traceback
@@ -142,6 +143,22 @@ def normalize_image_data(data):
 
     return data
 
+def _file_size(path):
+    """
+    Get a file's size with a single stat call.
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        int or None: Size in bytes, or None if the file doesn't exist
+    """
+    try:
+        return os.stat(path).st_size
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
 def validate_mrc_file(file_path):
     """
     Validates that an MRC file exists, is readable, and contains valid data.
@@ -155,13 +172,15 @@ def validate_mrc_file(file_path):
     Raises:
         MediaProcessingError: If validation fails
     """
-    if not os.path.exists(file_path):
+    try:
+        st = os.stat(file_path)
+    except (FileNotFoundError, NotADirectoryError):
         raise MediaProcessingError(f"MRC file does not exist: {file_path}")
 
-    if not os.path.isfile(file_path):
+    if not stat.S_ISREG(st.st_mode):
         raise MediaProcessingError(f"Path is not a file: {file_path}")
 
-    if os.path.getsize(file_path) == 0:
+    if st.st_size == 0:
         raise MediaProcessingError(f"MRC file is empty: {file_path}")
 
     try:
@@ -169,11 +188,11 @@ def validate_mrc_file(file_path):
             if mrc.data is None:
                 raise MediaProcessingError(f"MRC file contains no data: {file_path}")
 
-            if np.all(mrc.data == 0):
+            if not mrc.data.any():
                 raise MediaProcessingError(f"MRC file contains only zeros: {file_path}")
 
             # Check for NaN or infinity values
-            if np.isnan(mrc.data).any() or np.isinf(mrc.data).any():
+            if not np.isfinite(mrc.data).all():
                 # Don't raise, just log a warning
                 logger.warning(f"MRC file contains NaN or infinite values: {file_path}")
 
@@ -247,7 +266,7 @@ def generate_jpeg_thumbnail(source_file, output_file, min_side=150):
         return False
     finally:
         # Clean up partial output file if generation failed
-        if os.path.exists(output_file) and os.path.getsize(output_file) == 0:
+        if _file_size(output_file) == 0:
             try:
                 os.remove(output_file)
                 logger.debug(f"Removed empty output file: {output_file}")
@@ -274,8 +293,8 @@ def _generate_thumbnail_from_image(source_file, output_file, min_side):
         new_size = (int(width * ratio), int(height * ratio))
         img = img.resize(new_size, Image.LANCZOS)
 
-        # Save as JPEG
-        img.save(output_file, 'JPEG', quality=85)
+        # Save as JPEG (optimized Huffman tables: smaller file, same pixels)
+        img.save(output_file, 'JPEG', quality=85, optimize=True)
         logger.info(f"Generated thumbnail from image file: {output_file}")
         return True
 
@@ -312,10 +331,11 @@ def _generate_thumbnail_from_mrc(source_file, output_file, min_side):
                 logger.debug(f"Using 2D data with shape {slice_data.shape}")
 
             # Handle NaN or infinite values
-            if np.isnan(slice_data).any() or np.isinf(slice_data).any():
+            finite = np.isfinite(slice_data)
+            if not finite.all():
                 logger.warning(f"Replacing NaN/Inf values in MRC data from {source_file}")
-                slice_data = np.nan_to_num(slice_data, nan=0.0, posinf=np.max(slice_data[~np.isinf(slice_data)]),
-                                          neginf=np.min(slice_data[~np.isinf(slice_data)]))
+                slice_data = np.nan_to_num(slice_data, nan=0.0, posinf=np.max(slice_data[finite]),
+                                          neginf=np.min(slice_data[finite]))
 
             # Normalize using percentile-based approach
             normalized = normalize_image_data(slice_data)
@@ -333,8 +353,8 @@ def _generate_thumbnail_from_mrc(source_file, output_file, min_side):
             new_size = (int(width * ratio), int(height * ratio))
             img = img.resize(new_size, Image.LANCZOS)
 
-            # Save as JPEG
-            img.save(output_file, 'JPEG', quality=85)
+            # Save as JPEG (optimized Huffman tables: smaller file, same pixels)
+            img.save(output_file, 'JPEG', quality=85, optimize=True)
             logger.info(f"Generated thumbnail from MRC file: {output_file}, dimensions: {new_size}")
             return True
 
@@ -345,6 +365,23 @@ def _generate_thumbnail_from_mrc(source_file, output_file, min_side):
     except Exception as e:
         raise MediaProcessingError(f"Error processing MRC file: {str(e)}")
 
+def _frame_indices(num_slices, max_frames):
+    """
+    Pick evenly spaced slice indices for an animation, covering the first
+    and last slice and never returning more than max_frames indices.
+
+    Args:
+        num_slices (int): Number of slices in the stack
+        max_frames (int): Maximum number of frames to return
+
+    Returns:
+        numpy.ndarray: Sorted, unique slice indices
+    """
+    if num_slices <= max_frames:
+        return np.arange(num_slices)
+    return np.unique(np.linspace(0, num_slices - 1, num=max_frames).round().astype(np.int64))
+
+
 def generate_tiltseries_animation(source_file, output_file, min_side=384, fps=10, max_frames=100):
     """
     Generate a GIF animation from a tilt series MRC file.
@@ -395,11 +432,12 @@ def generate_tiltseries_animation(source_file, output_file, min_side=384, fps=10
                 raise MediaProcessingError(
                     f"Not enough slices for animation in tilt series: {data.shape[0]} slices")
 
-            # Handle NaN or infinite values
-            if np.isnan(data).any() or np.isinf(data).any():
+            # Handle NaN or infinite values (one vectorized pass builds the mask)
+            finite = np.isfinite(data)
+            if not finite.all():
                 logger.warning(f"Replacing NaN/Inf values in tilt series data from {source_file}")
                 # Get valid min/max for replacement values
-                valid_data = data[~np.isnan(data) & ~np.isinf(data)]
+                valid_data = data[finite]
                 if valid_data.size > 0:
                     valid_min, valid_max = np.min(valid_data), np.max(valid_data)
                 else:
@@ -412,14 +450,14 @@ def generate_tiltseries_animation(source_file, output_file, min_side=384, fps=10
 
             # Determine frame sampling based on max_frames
             num_slices = data.shape[0]
-            step = max(1, num_slices // max_frames)
+            frame_indices = _frame_indices(num_slices, max_frames)
 
             # Prepare frames for the animation
             frames = []
             pil_frames = []  # For PIL fallback
             frame_count = 0
 
-            for i in range(0, num_slices, step):
+            for i in frame_indices:
                 # Get the current slice
                 slice_data = data[i]
 
@@ -440,9 +478,10 @@ def generate_tiltseries_animation(source_file, output_file, min_side=384, fps=10
                     logger.warning(f"Error resizing frame {i}, trying nearest neighbor: {str(e)}")
                     img = img.resize(new_size, Image.NEAREST)
 
-                # Convert to RGB for GIF
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
+                # Keep frames grayscale: the GIF gets an exact grey palette
+                # instead of a per-frame RGB colour quantization
+                if img.mode != 'L':
+                    img = img.convert('L')
 
                 # Add to frames (numpy array for imageio)
                 frames.append(np.array(img))
@@ -467,7 +506,7 @@ def generate_tiltseries_animation(source_file, output_file, min_side=384, fps=10
                 logger.debug("Trying animation save method 1: imageio with explicit format")
                 imageio.mimsave(temp_output, frames, format='GIF', fps=fps, loop=0)
 
-                if os.path.exists(temp_output) and os.path.getsize(temp_output) > 0:
+                if (_file_size(temp_output) or 0) > 0:
                     os.replace(temp_output, output_file)
                     animation_saved = True
                     logger.info(f"Generated tilt series animation with imageio (method 1): {output_file}")
@@ -490,10 +529,10 @@ def generate_tiltseries_animation(source_file, output_file, min_side=384, fps=10
                         save_all=True,
                         duration=duration,
                         loop=0,
-                        optimize=False
+                        optimize=True
                     )
 
-                    if os.path.exists(temp_output) and os.path.getsize(temp_output) > 0:
+                    if (_file_size(temp_output) or 0) > 0:
                         os.replace(temp_output, output_file)
                         animation_saved = True
                         logger.info(f"Generated tilt series animation with PIL (method 2): {output_file}")
@@ -527,7 +566,7 @@ def generate_tiltseries_animation(source_file, output_file, min_side=384, fps=10
             except:
                 pass
 
-        if os.path.exists(output_file) and os.path.getsize(output_file) == 0:
+        if _file_size(output_file) == 0:
             try:
                 os.remove(output_file)
                 logger.debug(f"Removed empty output file: {output_file}")
@@ -585,11 +624,12 @@ def generate_tomogram_animation(source_file, output_file, min_side=384, fps=10,
                 raise MediaProcessingError(
                     f"Not enough slices for animation in tomogram: {data.shape[0]} slices")
 
-            # Handle NaN or infinite values
-            if np.isnan(data).any() or np.isinf(data).any():
+            # Handle NaN or infinite values (one vectorized pass builds the mask)
+            finite = np.isfinite(data)
+            if not finite.all():
                 logger.warning(f"Replacing NaN/Inf values in tomogram data from {source_file}")
                 # Get valid min/max for replacement values
-                valid_data = data[~np.isnan(data) & ~np.isinf(data)]
+                valid_data = data[finite]
                 if valid_data.size > 0:
                     valid_min, valid_max = np.min(valid_data), np.max(valid_data)
                 else:
@@ -600,10 +640,10 @@ def generate_tomogram_animation(source_file, output_file, min_side=384, fps=10,
             # We'll slice through the Z axis (first dimension in MRC files)
             num_slices = data.shape[0]
 
-            # Determine step size based on max_frames
-            step = max(1, num_slices // max_frames)
+            # Determine frame sampling based on max_frames
+            frame_indices = _frame_indices(num_slices, max_frames)
 
-            logger.debug(f"Tomogram has {num_slices} slices, using step size {step}")
+            logger.debug(f"Tomogram has {num_slices} slices, using {len(frame_indices)} frames")
 
             # Log data shape
             logger.info(f"Tomogram shape: {data.shape}")
@@ -613,7 +653,7 @@ def generate_tomogram_animation(source_file, output_file, min_side=384, fps=10,
             pil_frames = []  # For PIL fallback
             frame_count = 0
 
-            for i in range(0, num_slices, step):
+            for i in frame_indices:
                 # Get the current slice
                 slice_data = data[i]
 
@@ -634,9 +674,10 @@ def generate_tomogram_animation(source_file, output_file, min_side=384, fps=10,
                     logger.warning(f"Error resizing frame {i}, trying nearest neighbor: {str(e)}")
                     img = img.resize(new_size, Image.NEAREST)
 
-                # Convert to RGB for GIF
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
+                # Keep frames grayscale: the GIF gets an exact grey palette
+                # instead of a per-frame RGB colour quantization
+                if img.mode != 'L':
+                    img = img.convert('L')
 
                 # Add to frames (numpy array for imageio)
                 frames.append(np.array(img))
@@ -661,7 +702,7 @@ def generate_tomogram_animation(source_file, output_file, min_side=384, fps=10,
                 logger.debug("Trying animation save method 1: imageio with explicit format")
                 imageio.mimsave(temp_output, frames, format='GIF', fps=fps, loop=0)
 
-                if os.path.exists(temp_output) and os.path.getsize(temp_output) > 0:
+                if (_file_size(temp_output) or 0) > 0:
                     os.replace(temp_output, output_file)
                     animation_saved = True
                     logger.info(f"Generated tomogram animation with imageio (method 1): {output_file}")
@@ -684,10 +725,10 @@ def generate_tomogram_animation(source_file, output_file, min_side=384, fps=10,
                         save_all=True,
                         duration=duration,
                         loop=0,
-                        optimize=False
+                        optimize=True
                     )
 
-                    if os.path.exists(temp_output) and os.path.getsize(temp_output) > 0:
+                    if (_file_size(temp_output) or 0) > 0:
                         os.replace(temp_output, output_file)
                         animation_saved = True
                         logger.info(f"Generated tomogram animation with PIL (method 2): {output_file}")
@@ -721,7 +762,7 @@ def generate_tomogram_animation(source_file, output_file, min_side=384, fps=10,
             except:
                 pass
 
-        if os.path.exists(output_file) and os.path.getsize(output_file) == 0:
+        if _file_size(output_file) == 0:
             try:
                 os.remove(output_file)
                 logger.debug(f"Removed empty output file: {output_file}")
@@ -4,7 +4,9 @@ Template Utilities for TomCat Application
 This module provides utility functions for Flask templates,
 including URL mapping for blueprint route transition.
 """
-from flask import Flask, url_for as flask_url_for
+from functools import lru_cache
+
+from flask import Flask, request, url_for as flask_url_for
 
 # URL mapping from old routes to new blueprint routes
 URL_MAPPING = {
@@ -32,6 +34,16 @@ def register_template_utils(app: Flask):
         app: Flask application instance
     """
 
+    @lru_cache(maxsize=4096)
+    def cached_url_for(endpoint, url_root, blueprint, values):
+        """
+        Build a URL once per distinct set of arguments.
+
+        The request's URL root and blueprint are part of the cache key so
+        that URLs depending on the request context are never shared.
+        """
+        return flask_url_for(endpoint, **dict(values))
+
     @app.template_global()
     def url_for(endpoint, **values):
         """
@@ -46,8 +58,14 @@ def register_template_utils(app: Flask):
             str: URL for the endpoint
         """
         # Map old endpoint names to new blueprint routes
-        if endpoint in URL_MAPPING:
-            endpoint = URL_MAPPING[endpoint]
+        endpoint = URL_MAPPING.get(endpoint, endpoint)
+
+        # Relative endpoints ('.name') resolve against the current blueprint
+        blueprint = request.blueprint if endpoint.startswith('.') else None
 
-        # Call Flask's original url_for
-        return flask_url_for(endpoint, **values)
\ No newline at end of file
+        try:
+            return cached_url_for(endpoint, request.url_root, blueprint,
+                                  frozenset(values.items()))
+        except TypeError:
+            # Unhashable URL parameters can't be cached, build directly
+            return flask_url_for(endpoint, **values)
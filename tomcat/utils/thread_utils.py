@@ -4,20 +4,42 @@ Thread Utility Functions for TomCat Application
 This module provides utilities for managing background threads and tasks,
 including a thread pool implementation for efficient concurrent processing.
 """
+import os
+import time
 import logging
 import atexit
+import threading
+from collections import OrderedDict
+from functools import partial
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logger = logging.getLogger(__name__)
 
+# Default pool size: up to 4 workers, scaled down on small machines but
+# never below 2 so a search job can run alongside media generation
+DEFAULT_MAX_WORKERS = max(2, min(4, os.cpu_count() or 1))
+
+# Process-wide thread manager returned by get_thread_manager()
+_thread_manager = None
+
+# Seconds a finished or abandoned background job stays pollable
+JOB_TTL = 3600
+
+# Upper bound on tracked jobs; the oldest are dropped first
+JOB_MAXSIZE = 1024
+
 
 class ThreadManager:
     """
     Manages a thread pool for background task execution.
     Provides methods to submit tasks and clean up completed ones.
+
+    The pool is created once and reused for the lifetime of the manager;
+    request handlers should submit work here rather than creating their
+    own executors. Use get_thread_manager() to share a single instance.
     """
 
-    def __init__(self, max_workers=4):
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
         """
         Initialize the thread manager with a thread pool.
 
@@ -28,11 +50,28 @@ class ThreadManager:
         self.thread_pool = ThreadPoolExecutor(max_workers=max_workers)
         self.active_futures = {}
 
+        # Guards active_futures; tasks may be submitted and cleaned up from
+        # worker threads as well as request threads
+        self._lock = threading.Lock()
+
+        # Start all worker threads now rather than on the first requests
+        self._warm_up()
+
         # Register shutdown function
         atexit.register(self._shutdown)
 
         logger.info(f"Thread manager initialized with {max_workers} workers")
 
+    def _warm_up(self):
+        """
+        Start every worker thread up front. ThreadPoolExecutor only spawns a
+        thread when no idle one is available, so each warm-up task waits on a
+        barrier until all workers are running.
+        """
+        barrier = threading.Barrier(self.max_workers)
+        for _ in range(self.max_workers):
+            self.thread_pool.submit(partial(barrier.wait, timeout=5))
+
     def submit_task(self, task_key, func, *args, **kwargs):
         """
         Submit a task to the thread pool for execution.
@@ -46,14 +85,15 @@ class ThreadManager:
         Returns:
             bool: True if task was submitted, False if already running
         """
-        # Check if task is already running
-        if task_key in self.active_futures and not self.active_futures[task_key].done():
-            logger.debug(f"Task {task_key} is already running")
-            return False
+        with self._lock:
+            # Check if task is already running
+            if task_key in self.active_futures and not self.active_futures[task_key].done():
+                logger.debug(f"Task {task_key} is already running")
+                return False
 
-        # Submit the task to the thread pool
-        future = self.thread_pool.submit(func, *args, **kwargs)
-        self.active_futures[task_key] = future
+            # Submit the task to the thread pool
+            future = self.thread_pool.submit(func, *args, **kwargs)
+            self.active_futures[task_key] = future
 
         logger.debug(f"Submitted task: {task_key}")
         return True
@@ -65,24 +105,22 @@ class ThreadManager:
         Returns:
             int: Number of tasks cleaned up
         """
-        # Create a copy of keys to avoid modification during iteration
-        keys = list(self.active_futures.keys())
-        cleaned_count = 0
-
-        for key in keys:
-            future = self.active_futures[key]
-            if future.done():
-                # Handle any exceptions to prevent them from being silently dropped
-                try:
-                    # Get the result to ensure any exceptions are raised and logged
-                    result = future.result()
-                    logger.debug(f"Task {key} completed successfully")
-                except Exception as e:
-                    logger.error(f"Error in background task {key}: {str(e)}")
-
+        # Take the completed futures out under the lock, then report on them
+        with self._lock:
+            done = [(key, future) for key, future in self.active_futures.items() if future.done()]
+            for key, _ in done:
                 # Remove the future from tracking
                 del self.active_futures[key]
-                cleaned_count += 1
+        cleaned_count = len(done)
+
+        for key, future in done:
+            # Handle any exceptions to prevent them from being silently dropped
+            try:
+                # Get the result to ensure any exceptions are raised and logged
+                result = future.result()
+                logger.debug(f"Task {key} completed successfully")
+            except Exception as e:
+                logger.error(f"Error in background task {key}: {str(e)}")
 
         if cleaned_count > 0:
             logger.debug(f"Cleaned up {cleaned_count} completed tasks")
@@ -118,4 +156,108 @@ class ThreadManager:
             logger.debug("Thread pool shut down during garbage collection")
         except:
             # Ignore errors during garbage collection
-            pass
\ No newline at end of file
+            pass
+
+
+class JobStore:
+    """
+    Thread-safe status store for background jobs that clients poll.
+    Jobs expire JOB_TTL seconds after their last update and the store never
+    holds more than JOB_MAXSIZE jobs, so it doesn't grow for the lifetime
+    of the process.
+    """
+
+    def __init__(self, ttl=JOB_TTL, maxsize=JOB_MAXSIZE):
+        """
+        Initialize an empty job store.
+
+        Args:
+            ttl (float): Seconds a job is kept after its last update
+            maxsize (int): Maximum number of jobs to keep
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._jobs = OrderedDict()  # job_id -> (expires_at, fields), oldest update first
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        """
+        Drop expired jobs, then the oldest ones beyond maxsize. Caller holds the lock.
+
+        Args:
+            now (float): Current monotonic time
+        """
+        while self._jobs:
+            job_id, (expires_at, _) = next(iter(self._jobs.items()))
+            if expires_at > now and len(self._jobs) <= self.maxsize:
+                break
+            del self._jobs[job_id]
+
+    def set(self, job_id, **fields):
+        """
+        Create or replace a job.
+
+        Args:
+            job_id (str): Job identifier
+            **fields: Job status fields
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._jobs[job_id] = (now + self.ttl, fields)
+            self._jobs.move_to_end(job_id)
+            self._prune(now)
+
+    def update(self, job_id, **fields):
+        """
+        Update fields of an existing job.
+
+        Args:
+            job_id (str): Job identifier
+            **fields: Job status fields to change
+
+        Returns:
+            bool: True if the job was updated, False if it no longer exists
+        """
+        now = time.monotonic()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            self._jobs[job_id] = (now + self.ttl, {**job[1], **fields})
+            self._jobs.move_to_end(job_id)
+            self._prune(now)
+        return True
+
+    def get(self, job_id):
+        """
+        Get a copy of a job's fields.
+
+        Args:
+            job_id (str): Job identifier
+
+        Returns:
+            dict or None: Job status fields, or None if unknown or expired
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job[0] <= time.monotonic():
+                return None
+            return dict(job[1])
+
+
+def get_thread_manager(max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Get the process-wide thread manager, creating it on first use.
+    Repeated calls (e.g. creating the app more than once) reuse the same pool.
+
+    Args:
+        max_workers (int): Maximum number of worker threads, used only when
+                           the manager is first created
+
+    Returns:
+        ThreadManager: The shared thread manager
+    """
+    global _thread_manager
+    if _thread_manager is None:
+        _thread_manager = ThreadManager(max_workers=max_workers)
+    return _thread_manager